@@ -2,3 +2,39 @@ BASE_POSTGRES_TRANSACTIONS_DIRECTORY = "src/models/postgresql"
 
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_MINUTES = 30
+
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL_SECONDS = 30
+
+REPORT_STREAM_BATCH_SIZE = 1000
+# Days of report rows kept in memory, older days are always read live.
+REPORT_DAY_CACHE_SIZE = 400
+REPORT_DAY_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+TOKEN_CACHE_SIZE = 4096
+
+BULK_REVIEW_MAX_APPLICATIONS = 500
+
+ITEM_IMPORT_BATCH_SIZE = 5000
+ITEM_IMPORT_MAX_ERRORS = 1000
+
+# Shorter queries have no trigrams to look up in the index.
+ITEM_SEARCH_MIN_QUERY_LENGTH = 3
+ITEM_SEARCH_MAX_LIMIT = 200
+
+# Locks that order changes of the same item card, see ItemCodeIndex.
+ITEM_LOCK_STRIPES = 64
+
+STOCK_CACHE_SIZE = 256
+STOCK_CACHE_TTL_SECONDS = 600
+
+TRANSACTION_RETRY_ATTEMPTS = 5
+TRANSACTION_RETRY_BACKOFF_SECONDS = 0.02
+
+STOCK_ALERT_QUEUE_SIZE = 10000
+STOCK_ALERT_BATCH_SECONDS = 5
+STOCK_ALERT_DEDUP_SECONDS = 3600
+
+REPORT_JOB_MAX_PENDING = 20
+REPORT_JOB_MAX_RESULTS = 100
+REPORT_JOB_RETENTION_SECONDS = 24 * 60 * 60
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 import logging
 
 import psycopg2
@@ -6,12 +7,21 @@ from aiomisc.log import basic_config
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
+from .models.alerts import stock_alert_worker
+from .models.connector import db_connector
+from .models.items import item_code_index
+from .models.queries import query_registry
+from .models.report_jobs import report_jobs
+from .routers.alerts_router import alerts_router
 from .routers.applications_router import applications_router
 from .routers.items_router import items_router
 from .routers.reports_router import reports_router
+from .routers.service_router import service_router
 from .routers.users_router import users_router
 from .routers.warehouse_router import warehouse_router
+from .utils.metrics import MetricsMiddleware
 
 psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
 
@@ -22,7 +32,20 @@ tags_metadata = [
     },
 ]
 
-app = FastAPI(openapi_tags=tags_metadata)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    try:
+        await run_in_threadpool(item_code_index.load, db_connector.engine)
+    except Exception:
+        logging.exception("Failed to load item code index, codes are looked up in db")
+    stock_alert_worker.start()
+    yield
+    await run_in_threadpool(stock_alert_worker.stop)
+    await run_in_threadpool(report_jobs.stop)
+
+
+app = FastAPI(openapi_tags=tags_metadata, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,11 +54,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
+app.include_router(alerts_router)
 app.include_router(applications_router)
 app.include_router(items_router)
 app.include_router(reports_router)
+app.include_router(service_router)
 app.include_router(users_router)
 app.include_router(warehouse_router)
 
+query_registry.load()
+
 basic_config(logging.DEBUG, buffered=True)
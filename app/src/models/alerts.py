@@ -0,0 +1,209 @@
+import logging
+import queue
+import threading
+import time
+import typing
+
+from pydantic import BaseModel
+
+from ..constants import (
+    STOCK_ALERT_BATCH_SECONDS,
+    STOCK_ALERT_DEDUP_SECONDS,
+    STOCK_ALERT_QUEUE_SIZE,
+)
+from ..models import helpers
+from ..models.connector import db_connector
+from ..models.queries import query_registry
+from ..utils.metrics import Counter
+from ..utils.notifications import Notifier, get_notifier
+
+DELETE_STOCK_THRESHOLD = query_registry.declare(
+    "alerts/delete_stock_threshold.sql", "warehouse_id", "item_id"
+)
+GET_ALERT_NAMES = query_registry.declare(
+    "alerts/get_alert_names.sql", "warehouse_ids", "item_ids"
+)
+GET_STOCK_THRESHOLDS = query_registry.declare(
+    "alerts/get_stock_thresholds.sql", "warehouse_id"
+)
+UPSERT_STOCK_THRESHOLD = query_registry.declare(
+    "alerts/upsert_stock_threshold.sql", "warehouse_id", "item_id", "threshold"
+)
+
+stock_alerts = Counter(
+    "stock_alerts_total",
+    "Low stock alerts by what happened to them",
+    labelnames=("result",),
+)
+
+
+class StockThreshold(BaseModel):
+    warehouse_id: str
+    item_id: str
+    threshold: int  # alert when the count on the warehouse falls below it
+
+
+class ListStockThresholds(BaseModel):
+    items: typing.List[StockThreshold]
+
+
+class StockAlert(typing.NamedTuple):
+    warehouse_id: str
+    item_id: str
+    count: int
+    threshold: int
+
+
+def get_crossed_thresholds(deducted_rows) -> typing.List[StockAlert]:
+    """
+    Alerts for the rows of deduct_items_from_warehouse.sql whose count went
+    from at least the threshold to below it.
+    """
+    return [
+        StockAlert(row.warehouse_id, row.item_id, row.count, row.threshold)
+        for row in deducted_rows
+        if row.threshold is not None
+        and row.count < row.threshold <= row.count + row.deducted
+    ]
+
+
+def set_stock_threshold(engine, threshold: StockThreshold) -> StockThreshold:
+    if threshold.threshold <= 0:
+        raise helpers.get_bad_request("Порог должен быть больше нуля")
+    with engine.connect() as connection:
+        result = UPSERT_STOCK_THRESHOLD.execute(
+            connection, threshold.model_dump()
+        ).all()
+        connection.commit()
+    logging.info("Successfully set stock threshold")
+    return StockThreshold(**result[0]._mapping)
+
+
+def delete_stock_threshold(engine, warehouse_id: str, item_id: str):
+    with engine.connect() as connection:
+        result = DELETE_STOCK_THRESHOLD.execute(
+            connection, {"warehouse_id": warehouse_id, "item_id": item_id}
+        ).all()
+        if not result:
+            raise helpers.NOT_FOUND_ERROR
+        connection.commit()
+    logging.info("Successfully deleted stock threshold")
+
+
+def get_stock_thresholds(
+    engine, warehouse_id: typing.Optional[str]
+) -> ListStockThresholds:
+    with engine.connect() as connection:
+        items = [
+            StockThreshold(**row._mapping)
+            for row in GET_STOCK_THRESHOLDS.execute(
+                connection, {"warehouse_id": warehouse_id}
+            )
+        ]
+    return ListStockThresholds(items=items)
+
+
+class StockAlertWorker:
+    """
+    Sends alerts from a background thread, so that approvals only pay for
+    putting them into a queue. Alerts arriving within STOCK_ALERT_BATCH_SECONDS
+    go out in one batch with one alert per (warehouse, item), and an alert
+    for the same pair is not repeated within STOCK_ALERT_DEDUP_SECONDS.
+    """
+
+    _STOP = object()
+
+    def __init__(self, engine, notifier: Notifier):
+        self.engine = engine
+        self.notifier = notifier
+        self._queue: queue.Queue = queue.Queue(maxsize=STOCK_ALERT_QUEUE_SIZE)
+        self._sent_at: typing.Dict[typing.Tuple[str, str], float] = {}
+        self._thread: typing.Optional[threading.Thread] = None
+
+    def enqueue(self, alerts: typing.Iterable[StockAlert]):
+        for alert in alerts:
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                stock_alerts.inc("dropped")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="stock-alerts", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            alert = self._queue.get()
+            if alert is self._STOP:
+                break
+            batch = {(alert.warehouse_id, alert.item_id): alert}
+            deadline = time.monotonic() + STOCK_ALERT_BATCH_SECONDS
+            while True:
+                try:
+                    alert = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if alert is self._STOP:
+                    stopping = True
+                    break
+                batch[(alert.warehouse_id, alert.item_id)] = alert
+            try:
+                self._send(list(batch.values()))
+            except Exception:
+                stock_alerts.inc("failed", amount=len(batch))
+                logging.exception("Failed to send stock alerts")
+
+    def _send(self, alerts: typing.List[StockAlert]):
+        now = time.monotonic()
+        self._sent_at = {
+            key: sent_at
+            for key, sent_at in self._sent_at.items()
+            if now - sent_at < STOCK_ALERT_DEDUP_SECONDS
+        }
+        fresh = [
+            alert
+            for alert in alerts
+            if (alert.warehouse_id, alert.item_id) not in self._sent_at
+        ]
+        stock_alerts.inc("suppressed", amount=len(alerts) - len(fresh))
+        if not fresh:
+            return
+        with self.engine.connect() as connection:
+            names = {
+                (row.warehouse_id, row.item_id): row
+                for row in GET_ALERT_NAMES.execute(
+                    connection,
+                    {
+                        "warehouse_ids": [alert.warehouse_id for alert in fresh],
+                        "item_ids": [alert.item_id for alert in fresh],
+                    },
+                )
+            }
+        messages = []
+        for alert in fresh:
+            row = names.get((alert.warehouse_id, alert.item_id))
+            item_name = row.item_name if row and row.item_name else alert.item_id
+            warehouse_name = (
+                row.warehouse_name if row and row.warehouse_name else alert.warehouse_id
+            )
+            messages.append(
+                f"Заканчивается «{item_name}» на складе «{warehouse_name}»: "
+                f"осталось {alert.count}, порог {alert.threshold}"
+            )
+        self.notifier.send(messages)
+        for alert in fresh:
+            self._sent_at[(alert.warehouse_id, alert.item_id)] = now
+        stock_alerts.inc("sent", amount=len(fresh))
+
+
+stock_alert_worker = StockAlertWorker(db_connector.engine, get_notifier())
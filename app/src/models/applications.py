@@ -1,3 +1,4 @@
+import base64
 from datetime import datetime
 from enum import Enum
 import logging
@@ -5,14 +6,110 @@ import typing
 
 from pydantic import BaseModel
 
-from sqlalchemy import text
-
-from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+from ..constants import BULK_REVIEW_MAX_APPLICATIONS
 from ..models import helpers
+from ..models.alerts import StockAlert, get_crossed_thresholds, stock_alert_worker
+from ..models.connector import retry_on_conflict
 from ..models.items import ItemWithCount, ListItemsWithCount
-from ..models.users import ApiUser, get_user_by_id_transaction
-from ..models.warehouse import SimpleWarehouse, get_simple_warehouse_by_id_transaction
+from ..models.queries import query_registry
+from ..models.reports import report_generator
+from ..models.users import (
+    ApiUser,
+    get_user_by_id_transaction,
+    get_users_by_ids_transaction,
+)
+from ..models.warehouse import (
+    SimpleWarehouse,
+    bump_stock_versions_transaction,
+    get_simple_warehouse_by_id_transaction,
+    get_simple_warehouses_by_ids_transaction,
+)
 from ..utils.converters import convert_user
+from ..utils.serialization import trusted
+
+APPROVE_APPLICATIONS_BY_IDS = query_registry.declare(
+    "applications/approve_applications_by_ids.sql", "application_ids", "finished_by_id"
+)
+CREATE_APPLICATION = query_registry.declare(
+    "applications/create_application.sql",
+    "application_id",
+    "description",
+    "type",
+    "status",
+    "created_by_id",
+    "finished_by_id",
+    "sent_from_warehouse_id",
+    "sent_to_warehouse_id",
+    "linked_to_application_id",
+    "payload",
+    "created_at",
+    "updated_at",
+)
+DEDUCT_ITEMS_FROM_WAREHOUSE = query_registry.declare(
+    "applications/deduct_items_from_warehouse.sql",
+    "warehouse_ids",
+    "item_ids",
+    "counts",
+)
+DELETE_APPLICATION_BY_ID = query_registry.declare(
+    "applications/delete_application_by_id.sql", "application_id", "finished_by_id"
+)
+DEPOSIT_ITEMS_ON_WAREHOUSE = query_registry.declare(
+    "applications/deposit_items_on_warehouse.sql",
+    "warehouse_ids",
+    "item_ids",
+    "counts",
+)
+GET_APPLICATION_BY_ID = query_registry.declare(
+    "applications/get_application_by_id.sql", "application_id"
+)
+GET_APPLICATION_PAYLOAD = query_registry.declare(
+    "applications/get_application_payload.sql", "item_ids"
+)
+GET_APPLICATIONS_BY_IDS_FOR_UPDATE = query_registry.declare(
+    "applications/get_applications_by_ids_for_update.sql", "application_ids"
+)
+GET_APPLICATIONS_LIST = query_registry.declare(
+    "applications/get_applications_list.sql",
+    "cursor_created_at",
+    "cursor_application_id",
+    "limit",
+    "chained_to_user_id",
+    "status_filter",
+)
+LOCK_WAREHOUSE_STOCK = query_registry.declare(
+    "applications/lock_warehouse_stock.sql", "warehouse_ids", "item_ids"
+)
+PATCH_APPLICATION = query_registry.declare(
+    "applications/patch_application.sql",
+    "application_id",
+    "description",
+    "type",
+    "status",
+    "sent_from_warehouse_id",
+    "sent_to_warehouse_id",
+    "linked_to_application_id",
+    "payload",
+)
+RECORD_INVENTORY_MOVEMENTS = query_registry.declare(
+    "applications/record_inventory_movements.sql",
+    "application_ids",
+    "warehouse_ids",
+    "item_ids",
+    "deltas",
+    "created_ats",
+)
+REJECT_APPLICATION_BY_ID = query_registry.declare(
+    "applications/reject_application_by_id.sql", "application_id", "finished_by_id"
+)
+REJECT_APPLICATIONS_BY_IDS = query_registry.declare(
+    "applications/reject_applications_by_ids.sql", "application_ids", "finished_by_id"
+)
+RESERVE_WAREHOUSE_STOCK = query_registry.declare(
+    "applications/reserve_warehouse_stock.sql", "warehouse_ids", "item_ids", "deltas"
+)
+
+NOT_ENOUGH_ITEMS_DETAIL = "Нельзя списать больше товаров чем есть на складе"
 
 
 class ApplicationType(str, Enum):
@@ -91,7 +188,27 @@ class ApplicationWithActions(Application):
 
 class ApplicationsList(BaseModel):
     items: typing.List[Application]
-    cursor: typing.Optional[datetime] = None
+    cursor: typing.Optional[str] = None
+
+
+class ReviewAction(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+
+
+class BulkReviewRequest(BaseModel):
+    application_ids: typing.List[str]
+    action: ReviewAction
+
+
+class ReviewResult(BaseModel):
+    id: str
+    success: bool
+    detail: typing.Optional[str] = None
+
+
+class BulkReviewResponse(BaseModel):
+    results: typing.List[ReviewResult]
 
 
 class ChangeApplicationRequest(BaseModel):
@@ -114,44 +231,203 @@ class ChangeApplicationRequest(BaseModel):
         )
 
 
+def _build_application_payload(
+    items: typing.Mapping[str, typing.Any], item_id_to_count: typing.Mapping[str, int]
+) -> ApplicationPayload:
+    return trusted(
+        ApplicationPayload,
+        {
+            "items": [
+                trusted(
+                    ItemWithCount,
+                    {
+                        "id": item.id,
+                        "item_name": item.item_name,
+                        "item_type": item.item_type,
+                        "manufacturer": item.manufacturer,
+                        "model": item.model,
+                        "description": item.description,
+                        "codes": item.codes,
+                        "count": count,
+                    },
+                )
+                for item, count in (
+                    (items[item_id], count)
+                    for item_id, count in item_id_to_count.items()
+                    if item_id in items
+                )
+            ]
+        },
+    )
+
+
 def _get_application_payload(
     connection, item_id_to_count: typing.Mapping[str, id]
 ) -> ApplicationPayload:
-    with open(
-        f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_application_payload.sql"
-    ) as sql:
-        query = text(sql.read())
-        items = connection.execute(
-            query, {"item_ids": list(item_id_to_count.keys())}
+    items = GET_APPLICATION_PAYLOAD.execute(
+        connection, {"item_ids": list(item_id_to_count.keys())}
+    ).all()
+    return _build_application_payload(
+        {item.id: item for item in items}, item_id_to_count
+    )
+
+
+def _encode_cursor(created_at: datetime, application_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{application_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> typing.Tuple[datetime, str]:
+    try:
+        created_at, application_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(created_at), application_id
+    except ValueError:
+        raise helpers.get_bad_request("Некорректный курсор")
+
+
+def _get_stock_movements(application) -> typing.List[typing.Tuple[str, str, int]]:
+    sent_from_warehouse_id = application.sent_from_warehouse_id
+    sent_to_warehouse_id = application.sent_to_warehouse_id
+    movements = []
+    if sent_from_warehouse_id and (
+        not sent_to_warehouse_id
+        or sent_to_warehouse_id
+        and application.type == ApplicationType.SEND
+    ):
+        movements.extend(
+            (sent_from_warehouse_id, item_id, -count)
+            for item_id, count in application.payload.items()
+            if count
+        )
+    if sent_to_warehouse_id and (
+        not sent_from_warehouse_id
+        or sent_from_warehouse_id
+        and application.type == ApplicationType.RECIEVE
+    ):
+        movements.extend(
+            (sent_to_warehouse_id, item_id, count)
+            for item_id, count in application.payload.items()
+            if count
+        )
+    return movements
+
+
+def _aggregate_stock_deltas(
+    movements: typing.Iterable[typing.Tuple[str, str, int]]
+) -> typing.Dict[typing.Tuple[str, str], int]:
+    deltas: typing.Dict[typing.Tuple[str, str], int] = {}
+    for warehouse_id, item_id, delta in movements:
+        key = (warehouse_id, item_id)
+        deltas[key] = deltas.get(key, 0) + delta
+    return deltas
+
+
+def _apply_stock_deltas(
+    connection, deltas: typing.Mapping[typing.Tuple[str, str], int]
+) -> typing.Tuple[typing.Set[str], typing.List[StockAlert]]:
+    """
+    Touches every (warehouse, item) row once: one statement for all net
+    deductions and one for all net deposits. Existing rows must be locked
+    with LOCK_WAREHOUSE_STOCK beforehand; new rows are inserted in
+    (warehouse, item) order as well. Returns the changed warehouses, whose
+    stock versions the caller bumps, and the thresholds the deductions
+    crossed, which the caller sends after commit.
+    """
+    deltas = sorted(deltas.items())
+    alerts = []
+    deductions = [(*key, -delta) for key, delta in deltas if delta < 0]
+    if deductions:
+        warehouse_ids, item_ids, counts = map(list, zip(*deductions))
+        deducted = DEDUCT_ITEMS_FROM_WAREHOUSE.execute(
+            connection,
+            {"warehouse_ids": warehouse_ids, "item_ids": item_ids, "counts": counts},
         ).all()
-        return ApplicationPayload(
-            items=[
-                ItemWithCount(
-                    id=item.id,
-                    item_name=item.item_name,
-                    item_type=item.item_type,
-                    codes=item.codes,
-                    manufacturer=item.manufacturer,
-                    model=item.model,
-                    description=item.description,
-                    count=item_id_to_count[item.id],
-                )
-                for item in items
-            ]
+        if len(deducted) != len(deductions):
+            connection.rollback()
+            raise helpers.get_bad_request(NOT_ENOUGH_ITEMS_DETAIL)
+        alerts = get_crossed_thresholds(deducted)
+    deposits = [(*key, delta) for key, delta in deltas if delta > 0]
+    if deposits:
+        warehouse_ids, item_ids, counts = map(list, zip(*deposits))
+        DEPOSIT_ITEMS_ON_WAREHOUSE.execute(
+            connection,
+            {"warehouse_ids": warehouse_ids, "item_ids": item_ids, "counts": counts},
         )
+    return {warehouse_id for (warehouse_id, _), delta in deltas if delta}, alerts
+
+
+def _get_reservations(application) -> typing.List[typing.Tuple[str, str, int]]:
+    """
+    Items a pending application is going to take from its warehouse.
+    """
+    return [
+        (warehouse_id, item_id, -delta)
+        for warehouse_id, item_id, delta in _get_stock_movements(application)
+        if delta < 0
+    ]
+
+
+def _change_reservations(
+    connection, reserved: typing.Iterable = (), released: typing.Iterable = ()
+) -> typing.Set[str]:
+    """
+    Adds reservations of `reserved` applications and removes ones of
+    `released` applications in one statement. Returns the changed
+    warehouses, whose stock versions the caller bumps.
+    """
+    deltas = _aggregate_stock_deltas(
+        [
+            *(
+                reservation
+                for application in reserved
+                for reservation in _get_reservations(application)
+            ),
+            *(
+                (warehouse_id, item_id, -count)
+                for application in released
+                for warehouse_id, item_id, count in _get_reservations(application)
+            ),
+        ]
+    )
+    changes = sorted((*key, delta) for key, delta in deltas.items() if delta)
+    if not changes:
+        return set()
+    warehouse_ids, item_ids, deltas = map(list, zip(*changes))
+    RESERVE_WAREHOUSE_STOCK.execute(
+        connection,
+        {"warehouse_ids": warehouse_ids, "item_ids": item_ids, "deltas": deltas},
+    )
+    return set(warehouse_ids)
 
 
-def _repack_payload_from_application(
-    warehouse_id, item_id_to_count: typing.Mapping[str, id]
-) -> typing.List[tuple]:
-    warehouse_ids = []
-    item_ids = []
-    counts = []
-    for item_id, count in item_id_to_count.items():
-        warehouse_ids.append(warehouse_id)
-        item_ids.append(item_id)
-        counts.append(count)
-    return warehouse_ids, item_ids, counts
+def _record_stock_movements(
+    connection,
+    movements_by_application: typing.Iterable[
+        typing.Tuple[str, datetime, typing.List[typing.Tuple[str, str, int]]]
+    ],
+):
+    rows = [
+        (application_id, warehouse_id, item_id, delta, created_at)
+        for application_id, created_at, movements in movements_by_application
+        for warehouse_id, item_id, delta in movements
+    ]
+    if not rows:
+        return
+    application_ids, warehouse_ids, item_ids, deltas, created_ats = map(
+        list, zip(*rows)
+    )
+    RECORD_INVENTORY_MOVEMENTS.execute(
+        connection,
+        {
+            "application_ids": application_ids,
+            "warehouse_ids": warehouse_ids,
+            "item_ids": item_ids,
+            "deltas": deltas,
+            "created_ats": created_ats,
+        },
+    )
 
 
 def _validate_application(connection, new_application: ChangeApplicationRequest):
@@ -181,35 +457,60 @@ def _validate_application(connection, new_application: ChangeApplicationRequest)
     return created_by, sent_from_warehouse, sent_to_warehouse
 
 
-def _get_application_data(connection, application):
-    application_payload = _get_application_payload(connection, application.payload)
-    created_by = get_user_by_id_transaction(connection, application.created_by_id)
-    finished_by = (
-        get_user_by_id_transaction(connection, application.finished_by_id)
-        if application.finished_by_id
-        else None
-    )
-    sent_to_warehouse = (
-        get_simple_warehouse_by_id_transaction(
-            connection, application.sent_to_warehouse_id
+def _get_applications_data(connection, applications):
+    item_ids = set()
+    user_ids = set()
+    warehouse_ids = set()
+    for application in applications:
+        item_ids.update(application.payload.keys())
+        user_ids.add(application.created_by_id)
+        if application.finished_by_id:
+            user_ids.add(application.finished_by_id)
+        if application.sent_to_warehouse_id:
+            warehouse_ids.add(application.sent_to_warehouse_id)
+        if application.sent_from_warehouse_id:
+            warehouse_ids.add(application.sent_from_warehouse_id)
+
+    items = {
+        item.id: item
+        for item in (
+            GET_APPLICATION_PAYLOAD.execute(
+                connection, {"item_ids": list(item_ids)}
+            ).all()
+            if item_ids
+            else []
         )
-        if application.sent_to_warehouse_id
-        else None
+    }
+    users = get_users_by_ids_transaction(connection, user_ids) if user_ids else {}
+    warehouses = (
+        get_simple_warehouses_by_ids_transaction(connection, warehouse_ids)
+        if warehouse_ids
+        else {}
     )
-    sent_from_warehouse = (
-        get_simple_warehouse_by_id_transaction(
-            connection, application.sent_from_warehouse_id
+
+    result = []
+    for application in applications:
+        application_payload = _build_application_payload(items, application.payload)
+        result.append(
+            (
+                application_payload,
+                users.get(application.created_by_id),
+                users.get(application.finished_by_id)
+                if application.finished_by_id
+                else None,
+                warehouses.get(application.sent_to_warehouse_id)
+                if application.sent_to_warehouse_id
+                else None,
+                warehouses.get(application.sent_from_warehouse_id)
+                if application.sent_from_warehouse_id
+                else None,
+            )
         )
-        if application.sent_from_warehouse_id
-        else None
-    )
-    return (
-        application_payload,
-        created_by,
-        finished_by,
-        sent_to_warehouse,
-        sent_from_warehouse,
-    )
+    return result
+
+
+def _get_application_data(connection, application):
+    return _get_applications_data(connection, [application])[0]
 
 
 def get_application_with_actions(
@@ -234,35 +535,34 @@ def create_application(
         created_by, sent_from_warehouse, sent_to_warehouse = _validate_application(
             connection, new_application
         )
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/create_application.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = new_application.model_dump()
-            application = connection.execute(query, args).all()
-            if not application:
-                raise RuntimeError("Failed to create application")
-            application = application[0]
-            application_payload = _get_application_payload(
-                connection, application.payload
-            )
-            result = Application(
-                id=application.id,
-                application_data=ApplicationData(
-                    serial_number=application.serial_number,
-                    description=application.description,
-                    type=application.type,
-                    status=application.status,
-                    created_by=convert_user(created_by),
-                    finished_by=None,
-                    sent_from_warehouse=sent_from_warehouse,
-                    sent_to_warehouse=sent_to_warehouse,
-                    linked_to_application_id=application.linked_to_application_id,
-                ),
-                application_payload=application_payload,
-                created_at=application.created_at,
-                updated_at=application.updated_at,
+        args = new_application.model_dump()
+        application = CREATE_APPLICATION.execute(connection, args).all()
+        if not application:
+            raise RuntimeError("Failed to create application")
+        application = application[0]
+        # Repeated requests with the same idempotency token reserve once.
+        if application.is_created:
+            bump_stock_versions_transaction(
+                connection, _change_reservations(connection, reserved=[application])
             )
+        application_payload = _get_application_payload(connection, application.payload)
+        result = Application(
+            id=application.id,
+            application_data=ApplicationData(
+                serial_number=application.serial_number,
+                description=application.description,
+                type=application.type,
+                status=application.status,
+                created_by=convert_user(created_by),
+                finished_by=None,
+                sent_from_warehouse=sent_from_warehouse,
+                sent_to_warehouse=sent_to_warehouse,
+                linked_to_application_id=application.linked_to_application_id,
+            ),
+            application_payload=application_payload,
+            created_at=application.created_at,
+            updated_at=application.updated_at,
+        )
         connection.commit()
     logging.info("Created item card")
     return result
@@ -275,36 +575,52 @@ def update_application(
         created_by, sent_from_warehouse, sent_to_warehouse = _validate_application(
             connection, new_application
         )
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/patch_application.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = new_application.model_dump()
-            application = connection.execute(query, args).all()
-            if not application:
-                raise RuntimeError("Failed to create application")
-            application = application[0]
-            application_payload = _get_application_payload(
-                connection, application.payload
-            )
-            result = Application(
-                id=application.id,
-                application_data=ApplicationData(
-                    serial_number=application.serial_number,
-                    description=application.description,
-                    type=application.type,
-                    status=application.status,
-                    created_by=convert_user(created_by),
-                    finished_by=None,
-                    sent_from_warehouse=sent_from_warehouse,
-                    sent_to_warehouse=sent_to_warehouse,
-                    linked_to_application_id=application.linked_to_application_id,
-                ),
-                application_payload=application_payload,
-                created_at=application.created_at,
-                updated_at=application.updated_at,
-            )
+        previous = GET_APPLICATIONS_BY_IDS_FOR_UPDATE.execute(
+            connection, {"application_ids": [new_application.application_id]}
+        ).all()
+        if not previous:
+            raise helpers.NOT_FOUND_ERROR
+        args = new_application.model_dump()
+        application = PATCH_APPLICATION.execute(connection, args).all()
+        if not application:
+            raise RuntimeError("Failed to create application")
+        application = application[0]
+        bump_stock_versions_transaction(
+            connection,
+            _change_reservations(
+                connection,
+                reserved=[application]
+                if application.status == ApplicationStatus.PENDING
+                else [],
+                released=[
+                    row for row in previous if row.status == ApplicationStatus.PENDING
+                ],
+            ),
+        )
+        application_payload = _get_application_payload(connection, application.payload)
+        result = Application(
+            id=application.id,
+            application_data=ApplicationData(
+                serial_number=application.serial_number,
+                description=application.description,
+                type=application.type,
+                status=application.status,
+                created_by=convert_user(created_by),
+                finished_by=None,
+                sent_from_warehouse=sent_from_warehouse,
+                sent_to_warehouse=sent_to_warehouse,
+                linked_to_application_id=application.linked_to_application_id,
+            ),
+            application_payload=application_payload,
+            created_at=application.created_at,
+            updated_at=application.updated_at,
+        )
         connection.commit()
+    # A patch moves a successful application back to pending, so its rows
+    # leave the report of the day it was approved on.
+    report_generator.invalidate_days(
+        row.updated_at for row in previous if row.status == ApplicationStatus.SUCCESS
+    )
     logging.info("Created item card")
     return result
 
@@ -314,224 +630,323 @@ def get_application_by_id(
     id: str,
 ):
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            application = connection.execute(query, {"application_id": id}).all()
-            if not application:
-                return None
-            application = application[0]
-            (
-                application_payload,
-                created_by,
-                finished_by,
-                sent_to_warehouse,
-                sent_from_warehouse,
-            ) = _get_application_data(connection, application)
-            return Application(
-                id=application.id,
-                application_data=ApplicationData(
-                    serial_number=application.serial_number,
-                    description=application.description,
-                    type=application.type,
-                    status=application.status,
-                    created_by=convert_user(created_by),
-                    finished_by=convert_user(finished_by) if finished_by else None,
-                    sent_from_warehouse=sent_from_warehouse,
-                    sent_to_warehouse=sent_to_warehouse,
-                    linked_to_application_id=application.linked_to_application_id,
-                ),
-                application_payload=application_payload,
-                created_at=application.created_at,
-                updated_at=application.updated_at,
-            )
+        application = GET_APPLICATION_BY_ID.execute(
+            connection, {"application_id": id}
+        ).all()
+        if not application:
+            return None
+        application = application[0]
+        (
+            application_payload,
+            created_by,
+            finished_by,
+            sent_to_warehouse,
+            sent_from_warehouse,
+        ) = _get_application_data(connection, application)
+        return Application(
+            id=application.id,
+            application_data=ApplicationData(
+                serial_number=application.serial_number,
+                description=application.description,
+                type=application.type,
+                status=application.status,
+                created_by=convert_user(created_by),
+                finished_by=convert_user(finished_by) if finished_by else None,
+                sent_from_warehouse=sent_from_warehouse,
+                sent_to_warehouse=sent_to_warehouse,
+                linked_to_application_id=application.linked_to_application_id,
+            ),
+            application_payload=application_payload,
+            created_at=application.created_at,
+            updated_at=application.updated_at,
+        )
 
 
+@retry_on_conflict
 def approve_application(engine, id: str, approver_id: str):
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            application = connection.execute(query, {"application_id": id}).all()
-            if not application:
-                raise helpers.NOT_FOUND_ERROR
-            application = application[0]
-            if application.status != ApplicationStatus.PENDING:
-                raise helpers.get_bad_request(
-                    "Подтвердить можно заявку только в не финальном статусе"
-                )
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/approve_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            result = connection.execute(
-                query, {"application_id": id, "finished_by_id": approver_id}
-            ).all()
-            sent_from_warehouse_id, sent_to_warehouse_id, application_type, payload = (
-                result[0].sent_from_warehouse_id,
-                result[0].sent_to_warehouse_id,
-                result[0].type,
-                result[0].payload,
+        application = GET_APPLICATIONS_BY_IDS_FOR_UPDATE.execute(
+            connection, {"application_ids": [id]}
+        ).all()
+        if not application:
+            raise helpers.NOT_FOUND_ERROR
+        application = application[0]
+        if application.status != ApplicationStatus.PENDING:
+            raise helpers.get_bad_request(
+                "Подтвердить можно заявку только в не финальном статусе"
             )
-        if sent_from_warehouse_id and (
-            not sent_to_warehouse_id
-            or sent_to_warehouse_id
-            and application_type == ApplicationType.SEND
-        ):
-            with open(
-                f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/deduct_items_from_warehouse.sql"
-            ) as sql:
-                query = text(sql.read())
-                _, item_ids, counts = _repack_payload_from_application(
-                    sent_from_warehouse_id, payload
-                )
-                result = connection.execute(
-                    query,
-                    {
-                        "warehouse_id": sent_from_warehouse_id,
-                        "item_ids": item_ids,
-                        "counts": counts,
-                    },
-                )
-                if result.rowcount != len(item_ids):
-                    connection.rollback()
-                    raise helpers.get_bad_request(
-                        "Нельзя списать больше товаров чем есть на складе"
-                    )
-        if sent_to_warehouse_id and (
-            not sent_from_warehouse_id
-            or sent_from_warehouse_id
-            and application_type == ApplicationType.RECIEVE
-        ):
-            with open(
-                f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/deposit_items_on_warehouse.sql"
-            ) as sql:
-                query = text(sql.read())
-                warehouse_ids, item_ids, counts = _repack_payload_from_application(
-                    sent_to_warehouse_id, payload
-                )
-                connection.execute(
-                    query,
-                    {
-                        "warehouse_ids": warehouse_ids,
-                        "item_ids": item_ids,
-                        "counts": counts,
-                    },
-                )
+        failures, alerts, approved_at = _approve_applications(
+            connection, [application], approver_id
+        )
+        if failures:
+            raise helpers.get_bad_request(failures[id])
         connection.commit()
+    stock_alert_worker.enqueue(alerts)
+    report_generator.invalidate_days(approved_at)
     logging.info(f"Successfully approved application {id}")
 
 
 def reject_application(engine, id: str, reviewer_id: str):
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            application = connection.execute(query, {"application_id": id}).all()
-            if not application:
-                raise helpers.NOT_FOUND_ERROR
-            application = application[0]
-            if application.status != ApplicationStatus.PENDING:
-                raise helpers.get_bad_request(
-                    "Отклонить можно заявку только в не финальном статусе"
-                )
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/reject_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            result = connection.execute(
-                query, {"application_id": id, "finished_by_id": reviewer_id}
-            ).all()
-            if not result:
-                raise helpers.NOT_FOUND_ERROR
+        application = GET_APPLICATION_BY_ID.execute(
+            connection, {"application_id": id}
+        ).all()
+        if not application:
+            raise helpers.NOT_FOUND_ERROR
+        application = application[0]
+        if application.status != ApplicationStatus.PENDING:
+            raise helpers.get_bad_request(
+                "Отклонить можно заявку только в не финальном статусе"
+            )
+        result = REJECT_APPLICATION_BY_ID.execute(
+            connection, {"application_id": id, "finished_by_id": reviewer_id}
+        ).all()
+        if not result:
+            raise helpers.NOT_FOUND_ERROR
+        bump_stock_versions_transaction(
+            connection, _change_reservations(connection, released=result)
+        )
         connection.commit()
     logging.info(f"Successfully rejected application {id}")
 
 
 def delete_application(engine, id: str, user_id: str):
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            application = connection.execute(query, {"application_id": id}).all()
-            if not application:
-                raise helpers.NOT_FOUND_ERROR
-            application = application[0]
-            if application.created_by_id != user_id:
-                raise helpers.get_bad_request(
-                    "Только создатель заявки может ее отклонить"
-                )
-            if application.status != ApplicationStatus.PENDING:
-                raise helpers.get_bad_request(
-                    "Удалить можно заявку только в не финальном статусе"
-                )
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/delete_application_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            connection.execute(query, {"application_id": id, "finished_by_id": user_id})
+        application = GET_APPLICATION_BY_ID.execute(
+            connection, {"application_id": id}
+        ).all()
+        if not application:
+            raise helpers.NOT_FOUND_ERROR
+        application = application[0]
+        if application.created_by_id != user_id:
+            raise helpers.get_bad_request("Только создатель заявки может ее отклонить")
+        if application.status != ApplicationStatus.PENDING:
+            raise helpers.get_bad_request(
+                "Удалить можно заявку только в не финальном статусе"
+            )
+        result = DELETE_APPLICATION_BY_ID.execute(
+            connection, {"application_id": id, "finished_by_id": user_id}
+        ).all()
+        bump_stock_versions_transaction(
+            connection, _change_reservations(connection, released=result)
+        )
         connection.commit()
     logging.info(f"Successfully deleted application {id}")
 
 
+def _approve_applications(
+    connection, applications, approver_id: str
+) -> typing.Tuple[
+    typing.Dict[str, str], typing.List[StockAlert], typing.List[datetime]
+]:
+    """
+    Approves the applications in the given order as long as stock allows,
+    then applies the net delta of all approved ones per (warehouse, item).
+    Returns failure details of the applications that were left pending, the
+    crossed stock thresholds and the approval times, whose report days are
+    to be invalidated after commit.
+
+    Locks are always taken in the same order, applications by id, then
+    stock rows by (warehouse, item), then reservations, then new stock
+    rows and stock versions by warehouse, so that concurrent approvals and
+    other changes of applications wait for each other instead of
+    deadlocking.
+    """
+    movements_by_id = {
+        application.id: _get_stock_movements(application)
+        for application in applications
+    }
+    keys = {
+        (warehouse_id, item_id)
+        for movements in movements_by_id.values()
+        for warehouse_id, item_id, _ in movements
+    }
+    stock = {}
+    if keys:
+        warehouse_ids, item_ids = map(list, zip(*sorted(keys)))
+        stock = {
+            (row.warehouse_id, row.item_id): row.count
+            for row in LOCK_WAREHOUSE_STOCK.execute(
+                connection, {"warehouse_ids": warehouse_ids, "item_ids": item_ids}
+            )
+        }
+
+    failures = {}
+    approved_deltas: typing.Dict[typing.Tuple[str, str], int] = {}
+    for application in applications:
+        deltas = _aggregate_stock_deltas(movements_by_id[application.id])
+        if any(
+            stock.get(key, 0) + approved_deltas.get(key, 0) + delta < 0
+            for key, delta in deltas.items()
+            if delta < 0
+        ):
+            failures[application.id] = NOT_ENOUGH_ITEMS_DETAIL
+            continue
+        for key, delta in deltas.items():
+            approved_deltas[key] = approved_deltas.get(key, 0) + delta
+
+    approved_ids = [
+        application.id for application in applications if application.id not in failures
+    ]
+    if not approved_ids:
+        return failures, [], []
+    approved = APPROVE_APPLICATIONS_BY_IDS.execute(
+        connection, {"application_ids": approved_ids, "finished_by_id": approver_id}
+    ).all()
+    changed_warehouse_ids = _change_reservations(
+        connection,
+        released=[
+            application
+            for application in applications
+            if application.id not in failures
+        ],
+    )
+    changed_by_deltas, alerts = _apply_stock_deltas(connection, approved_deltas)
+    bump_stock_versions_transaction(
+        connection, changed_warehouse_ids | changed_by_deltas
+    )
+    _record_stock_movements(
+        connection,
+        [
+            (row.application_id, row.updated_at, movements_by_id[row.application_id])
+            for row in approved
+        ],
+    )
+    return failures, alerts, [row.updated_at for row in approved]
+
+
+@retry_on_conflict
+def review_applications(
+    engine, request: BulkReviewRequest, reviewer_id: str
+) -> BulkReviewResponse:
+    application_ids = list(dict.fromkeys(request.application_ids))
+    if len(application_ids) > BULK_REVIEW_MAX_APPLICATIONS:
+        raise helpers.get_bad_request(
+            f"Можно обработать не более {BULK_REVIEW_MAX_APPLICATIONS} заявок за раз"
+        )
+    with engine.connect() as connection:
+        applications = {
+            application.id: application
+            for application in GET_APPLICATIONS_BY_IDS_FOR_UPDATE.execute(
+                connection, {"application_ids": application_ids}
+            )
+        }
+        failures = {}
+        alerts = []
+        approved_at = []
+        pending = []
+        for application_id in application_ids:
+            application = applications.get(application_id)
+            if application is None:
+                failures[application_id] = helpers.NOT_FOUND_ERROR.detail
+            elif application.status != ApplicationStatus.PENDING:
+                failures[application_id] = (
+                    "Подтвердить можно заявку только в не финальном статусе"
+                    if request.action == ReviewAction.APPROVE
+                    else "Отклонить можно заявку только в не финальном статусе"
+                )
+            else:
+                pending.append(application)
+
+        if request.action == ReviewAction.APPROVE:
+            approve_failures, alerts, approved_at = _approve_applications(
+                connection, pending, reviewer_id
+            )
+            failures.update(approve_failures)
+        elif pending:
+            REJECT_APPLICATIONS_BY_IDS.execute(
+                connection,
+                {
+                    "application_ids": [application.id for application in pending],
+                    "finished_by_id": reviewer_id,
+                },
+            )
+            bump_stock_versions_transaction(
+                connection, _change_reservations(connection, released=pending)
+            )
+        connection.commit()
+    stock_alert_worker.enqueue(alerts)
+    report_generator.invalidate_days(approved_at)
+    logging.info(
+        f"Reviewed {len(application_ids) - len(failures)} of "
+        f"{len(application_ids)} applications with {request.action.value}"
+    )
+    return BulkReviewResponse(
+        results=[
+            ReviewResult(
+                id=application_id,
+                success=application_id not in failures,
+                detail=failures.get(application_id),
+            )
+            for application_id in application_ids
+        ]
+    )
+
+
 def get_applications_list(
     engine,
     chained_to_user_id: typing.Optional[str],
-    cursor: datetime,
+    cursor: typing.Optional[str],
     limit: int,
     status_filter: typing.Optional[ApplicationStatus],
 ):
+    cursor_created_at, cursor_application_id = (
+        _decode_cursor(cursor) if cursor else (None, None)
+    )
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/applications/get_applications_list.sql"
-        ) as sql:
-            query = text(sql.read())
-            applications = connection.execute(
-                query,
+        applications = GET_APPLICATIONS_LIST.execute(
+            connection,
+            {
+                "cursor_created_at": cursor_created_at,
+                "cursor_application_id": cursor_application_id,
+                "limit": limit,
+                "chained_to_user_id": chained_to_user_id,
+                "status_filter": status_filter,
+            },
+        ).all()
+        items = []
+        for application, (
+            application_payload,
+            created_by,
+            finished_by,
+            sent_to_warehouse,
+            sent_from_warehouse,
+        ) in zip(applications, _get_applications_data(connection, applications)):
+            application_data = trusted(
+                ApplicationData,
                 {
-                    "cursor": cursor,
-                    "limit": limit,
-                    "chained_to_user_id": chained_to_user_id,
-                    "status_filter": status_filter,
+                    "serial_number": application.serial_number,
+                    "description": application.description,
+                    "type": ApplicationType(application.type),
+                    "status": ApplicationStatus(application.status),
+                    "created_by": convert_user(created_by),
+                    "finished_by": convert_user(finished_by) if finished_by else None,
+                    "sent_from_warehouse": sent_from_warehouse,
+                    "sent_to_warehouse": sent_to_warehouse,
+                    "linked_to_application_id": application.linked_to_application_id,
                 },
-            ).all()
-            result = ApplicationsList(
-                items=[],
-                cursor=applications[-1].created_at
-                if len(applications) == limit
-                else None,
             )
-            for application in applications:
-                (
-                    application_payload,
-                    created_by,
-                    finished_by,
-                    sent_to_warehouse,
-                    sent_from_warehouse,
-                ) = _get_application_data(connection, application)
-                result.items.append(
-                    Application(
-                        id=application.id,
-                        application_data=ApplicationData(
-                            serial_number=application.serial_number,
-                            description=application.description,
-                            type=application.type,
-                            status=application.status,
-                            created_by=convert_user(created_by),
-                            finished_by=convert_user(finished_by)
-                            if finished_by
-                            else None,
-                            sent_from_warehouse=sent_from_warehouse,
-                            sent_to_warehouse=sent_to_warehouse,
-                            linked_to_application_id=application.linked_to_application_id,
-                        ),
-                        application_payload=application_payload,
-                        created_at=application.created_at,
-                        updated_at=application.updated_at,
-                    )
+            items.append(
+                trusted(
+                    Application,
+                    {
+                        "id": application.id,
+                        "application_data": application_data,
+                        "application_payload": application_payload,
+                        "created_at": application.created_at,
+                        "updated_at": application.updated_at,
+                    },
+                )
+            )
+        result = trusted(
+            ApplicationsList,
+            {
+                "items": items,
+                "cursor": _encode_cursor(
+                    applications[-1].created_at, applications[-1].id
                 )
-            return result
+                if len(applications) == limit
+                else None,
+            },
+        )
+        return result
@@ -1,21 +1,170 @@
+import functools
+import logging
 import os
+import random
+import threading
+import time
+import typing
 
-from sqlalchemy import create_engine
+from pydantic import BaseModel
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from ..constants import TRANSACTION_RETRY_ATTEMPTS, TRANSACTION_RETRY_BACKOFF_SECONDS
+from ..utils.metrics import CallbackMetric, Counter, Histogram
 
 DB_CONTAINER_NAME = "database"
 
+RETRYABLE_ERROR_CODES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock_detected",
+}
+
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+)
+transaction_retries = Counter(
+    "db_transaction_retries_total",
+    "Transactions rerun after a deadlock or a serialization failure",
+    labelnames=("reason",),
+)
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    timeouts: int
+    checkout_wait_buckets: typing.Mapping[str, int]
+    checkout_wait_count: int
+    checkout_wait_sum: float
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeouts = 0
+        self._timeouts_lock = threading.Lock()
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._timeouts_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - started_at)
+
+
+def _get_bool_env(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def retry_on_conflict(function):
+    """
+    Reruns `function` when postgres aborts its transaction because of a
+    deadlock or a serialization failure. The function must open and finish
+    its own transaction, so that every attempt starts from scratch.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return function(*args, **kwargs)
+            except exc.OperationalError as error:
+                reason = RETRYABLE_ERROR_CODES.get(getattr(error.orig, "pgcode", None))
+                if reason is None or attempt >= TRANSACTION_RETRY_ATTEMPTS:
+                    raise
+                transaction_retries.inc(reason)
+                logging.warning(
+                    f"Retrying {function.__name__} after {reason}, attempt {attempt}"
+                )
+            # Jitter keeps the conflicting transactions from meeting again.
+            time.sleep(
+                random.uniform(
+                    0, TRANSACTION_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                )
+            )
+            attempt += 1
+
+    return wrapper
+
 
 class DBConnector:
     def __init__(self):
         user = os.environ.get("PGUSER")
         password = os.environ.get("PGPASSWORD")
-        host = DB_CONTAINER_NAME
+        host = os.environ.get("PGHOST", DB_CONTAINER_NAME)
         port = os.environ.get("PGPORT")
         db = os.environ.get("PGDATABASE")
 
         database_url = f"postgresql://{user}:{password}@{host}:{port}/{db}"
 
-        self.engine = create_engine(database_url)
+        connect_args = {}
+        statement_timeout = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+        if statement_timeout:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+
+        self.engine = create_engine(
+            database_url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.environ.get("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", -1)),
+            pool_pre_ping=_get_bool_env("DB_POOL_PRE_PING", False),
+            connect_args=connect_args,
+        )
+
+    def get_pool_stats(self) -> PoolStats:
+        pool = self.engine.pool
+        buckets, wait_sum, wait_count = pool_checkout_wait.collect().get(
+            (), ([0] * (len(pool_checkout_wait.buckets) + 1), 0.0, 0)
+        )
+        cumulative = 0
+        checkout_wait_buckets = {}
+        for bound, count in zip(
+            [str(bound) for bound in pool_checkout_wait.buckets] + ["+Inf"], buckets
+        ):
+            cumulative += count
+            checkout_wait_buckets[bound] = cumulative
+        return PoolStats(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            timeouts=pool.timeouts,
+            checkout_wait_buckets=checkout_wait_buckets,
+            checkout_wait_count=wait_count,
+            checkout_wait_sum=wait_sum,
+        )
 
 
 db_connector = DBConnector()
+
+CallbackMetric(
+    "db_pool_connections",
+    "Connections of the pool by state",
+    lambda: {
+        ("checked_out",): db_connector.engine.pool.checkedout(),
+        ("checked_in",): db_connector.engine.pool.checkedin(),
+        ("overflow",): max(db_connector.engine.pool.overflow(), 0),
+    },
+    labelnames=("state",),
+)
+CallbackMetric(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up waiting for a connection",
+    lambda: {(): db_connector.engine.pool.timeouts},
+    type="counter",
+)
@@ -1,3 +1,5 @@
+import typing
+
 from fastapi import HTTPException, status
 from pydantic import BaseModel
 
@@ -40,3 +42,11 @@ def get_bad_request(detail: str):
         detail=detail,
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def etag_matches(if_none_match: typing.Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    return any(
+        tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(",")
+    )
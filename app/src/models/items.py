@@ -1,11 +1,74 @@
+import codecs
+import csv
+from enum import Enum
+import io
+import json
 import logging
+import threading
 import typing
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from sqlalchemy import text
+from ..constants import (
+    ITEM_IMPORT_BATCH_SIZE,
+    ITEM_IMPORT_MAX_ERRORS,
+    ITEM_LOCK_STRIPES,
+    STOCK_CACHE_SIZE,
+    STOCK_CACHE_TTL_SECONDS,
+)
+from ..models import helpers
+from ..models.queries import query_registry
+from ..models.reports import report_generator
+from ..models.warehouse import bump_stock_versions_by_item_transaction
+from ..utils.cache import TTLCache
+from ..utils.metrics import Counter
+from ..utils.serialization import trusted
 
-from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+COPY_ITEMS_IMPORT = query_registry.declare("items/copy_items_import.sql")
+CREATE_ITEMS_IMPORT_TABLE = query_registry.declare(
+    "items/create_items_import_table.sql"
+)
+MERGE_ITEMS_IMPORT = query_registry.declare("items/merge_items_import.sql")
+
+CREATE_ITEM = query_registry.declare(
+    "items/create_item.sql",
+    "id",
+    "item_name",
+    "item_type",
+    "manufacturer",
+    "model",
+    "description",
+    "codes",
+)
+GET_ITEM_BY_ID = query_registry.declare("items/get_item_by_id.sql", "item_id")
+GET_ITEM_COUNT_BY_ID = query_registry.declare(
+    "items/get_item_count_by_id.sql", "item_id"
+)
+GET_ITEMS = query_registry.declare("items/get_items.sql")
+GET_ITEMS_BY_CODES = query_registry.declare("items/get_items_by_codes.sql", "codes")
+GET_ITEM_COUNT_BY_WAREHOUSE = query_registry.declare(
+    "items/get_item_count_by_warehouse.sql", "warehouse_id"
+)
+SEARCH_ITEMS = query_registry.declare(
+    "items/search_items.sql", "pattern", "cursor", "limit"
+)
+SEARCH_ITEMS_BY_CODE = query_registry.declare(
+    "items/search_items_by_code.sql", "code", "pattern", "cursor", "limit"
+)
+UPDATE_ITEM = query_registry.declare(
+    "items/update_item.sql",
+    "id",
+    "item_name",
+    "item_type",
+    "manufacturer",
+    "model",
+    "description",
+    "codes",
+)
+DELETE_ITEM = query_registry.declare("items/delete_item.sql", "item_id")
+
+# Backslash goes first, so the escapes added after it are not doubled.
+_COPY_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
 
 
 class Item(BaseModel):
@@ -48,34 +111,209 @@ class UpdateItem(BaseModel):
     codes: typing.Optional[typing.List[str]] = None
 
 
+class ItemImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ImportItem(CreateItem):
+    id: str  # idempotency token of the card
+
+
+class ItemImportError(BaseModel):
+    line: int
+    detail: str
+
+
+class ItemImportResult(BaseModel):
+    total: int
+    created: int
+    existing: int
+    failed: int
+    errors: typing.List[ItemImportError]  # first ITEM_IMPORT_MAX_ERRORS of them
+
+
 class ItemWithCount(Item):
     count: int
 
 
+class ItemWithStock(ItemWithCount):
+    available: int  # count minus items reserved by pending applications
+
+
 class ItemWithWarehouseCount(Item):
     warehouse_count: typing.Mapping[
         str, int
     ] = dict()  # warehouse name to item count on warehouse
+    warehouse_available: typing.Mapping[
+        str, int
+    ] = dict()  # warehouse name to item count not reserved by pending applications
 
 
 class ListItems(BaseModel):
     items: typing.List[Item]
 
 
+class ItemsSearchResult(ListItems):
+    cursor: typing.Optional[str] = None
+
+
 class ListItemsWithCount(BaseModel):
     items: typing.List[ItemWithCount]
 
 
+class ListItemsWithStock(BaseModel):
+    items: typing.List[ItemWithStock]
+
+
+class ItemCodesRequest(BaseModel):
+    codes: typing.List[str]
+
+
+class ItemsByCodes(BaseModel):
+    items: typing.Mapping[str, typing.List[Item]]  # code to items with it
+
+
+code_lookups = Counter(
+    "item_code_lookups_total",
+    "Codes resolved to items, by where they were found",
+    labelnames=("source",),
+)
+
+
+class ItemCodeIndex:
+    """
+    Cards of all not deleted items by each of their codes, so that a
+    scanned code resolves without a database round trip. It is loaded on
+    startup and updated by the item handlers of this process. Until it is
+    loaded every lookup misses and is served from the database.
+
+    Cards are kept as plain tuples and codes map to tuples of ids, which
+    takes a fraction of the memory of models and sets.
+
+    Handlers that change a card hold `item_lock` of its id from the
+    statement to the change of the index, so concurrent changes of the
+    same card reach the index in the order they were committed.
+    """
+
+    def __init__(self):
+        self._items: typing.Dict[str, tuple] = {}
+        self._ids_by_code: typing.Dict[str, typing.Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        # Changes made while a load reads the table, replayed on its result.
+        self._changes_during_load: typing.Optional[list] = None
+        # Number of puts and removals so far, see `put_if_unchanged`.
+        self.changes = 0
+        self.is_loaded = False
+        self._item_locks = tuple(threading.Lock() for _ in range(ITEM_LOCK_STRIPES))
+
+    def item_lock(self, item_id: str) -> threading.Lock:
+        return self._item_locks[hash(item_id) % len(self._item_locks)]
+
+    def load(self, engine):
+        items: typing.Dict[str, tuple] = {}
+        ids_by_code: typing.Dict[str, typing.Tuple[str, ...]] = {}
+        with self._lock:
+            self._changes_during_load = []
+        try:
+            with engine.connect() as connection:
+                for row in GET_ITEMS.execute(connection):
+                    row = tuple(row)
+                    items[row[0]] = row
+                    for code in row[-1]:
+                        ids_by_code[code] = ids_by_code.get(code, ()) + (row[0],)
+                connection.commit()
+        except Exception:
+            with self._lock:
+                self._changes_during_load = None
+            raise
+        with self._lock:
+            self._items = items
+            self._ids_by_code = ids_by_code
+            for change in self._changes_during_load:
+                change()
+            self._changes_during_load = None
+            self.is_loaded = True
+        logging.info(f"Loaded {len(items)} item cards into the code index")
+
+    def _put(self, item: Item):
+        self._remove(item.id)
+        self._items[item.id] = tuple(item.model_dump().values())
+        for code in item.codes:
+            self._ids_by_code[code] = self._ids_by_code.get(code, ()) + (item.id,)
+
+    def _remove(self, item_id: str):
+        row = self._items.pop(item_id, None)
+        if row is None:
+            return
+        for code in row[-1]:
+            ids = tuple(id for id in self._ids_by_code.get(code, ()) if id != item_id)
+            if ids:
+                self._ids_by_code[code] = ids
+            else:
+                self._ids_by_code.pop(code, None)
+
+    def put(self, item: Item):
+        with self._lock:
+            self.changes += 1
+            if self._changes_during_load is not None:
+                self._changes_during_load.append(lambda: self._put(item))
+            if self.is_loaded:
+                self._put(item)
+
+    def put_if_unchanged(self, item: Item, changes: int):
+        """
+        Puts a card read from the database unless a card was put or removed
+        since `changes` was taken before the read, as the card read could be
+        older than the one changed meanwhile.
+        """
+        with self._lock:
+            if self.changes != changes:
+                return
+            if self._changes_during_load is not None:
+                self._changes_during_load.append(lambda: self._put(item))
+            if self.is_loaded:
+                self._put(item)
+
+    def remove(self, item_id: str):
+        with self._lock:
+            self.changes += 1
+            if self._changes_during_load is not None:
+                self._changes_during_load.append(lambda: self._remove(item_id))
+            self._remove(item_id)
+
+    def lookup(
+        self, codes: typing.Iterable[str]
+    ) -> typing.Tuple[typing.Dict[str, typing.List[Item]], typing.List[str]]:
+        """
+        Returns items of the codes found in the index and the codes that
+        were not.
+        """
+        found: typing.Dict[str, typing.List[tuple]] = {}
+        missing: typing.List[str] = []
+        with self._lock:
+            for code in codes:
+                ids = self._ids_by_code.get(code)
+                if ids:
+                    found[code] = [self._items[item_id] for item_id in ids]
+                else:
+                    missing.append(code)
+        return {
+            code: [trusted(Item, dict(zip(Item.model_fields, row))) for row in rows]
+            for code, rows in found.items()
+        }, missing
+
+
+item_code_index = ItemCodeIndex()
+
+
 def create_item(engine, idempotency_token: str, new_item: CreateItem):
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/create_item.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = new_item.get_item(idempotency_token).model_dump()
-            for row in connection.execute(query, args):
-                result = Item(**row._mapping)
+        args = new_item.get_item(idempotency_token).model_dump()
+        for row in CREATE_ITEM.execute(connection, args):
+            result = Item(**row._mapping)
         connection.commit()
+    item_code_index.put(result)
     logging.info("Created item card")
     return result
 
@@ -83,19 +321,12 @@ def create_item(engine, idempotency_token: str, new_item: CreateItem):
 def get_item_by_id(engine, item_id: str):
     item: typing.Optional[ItemWithWarehouseCount] = None
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/get_item_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            for row in connection.execute(query, {"item_id": item_id}):
-                item = ItemWithWarehouseCount(**row._mapping)
+        for row in GET_ITEM_BY_ID.execute(connection, {"item_id": item_id}):
+            item = ItemWithWarehouseCount(**row._mapping)
         if item:
-            with open(
-                f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/get_item_count_by_id.sql"
-            ) as sql:
-                query = text(sql.read())
-                for row in connection.execute(query, {"item_id": item_id}):
-                    item.warehouse_count[row.warehouse_name] = row.item_count
+            for row in GET_ITEM_COUNT_BY_ID.execute(connection, {"item_id": item_id}):
+                item.warehouse_count[row.warehouse_name] = row.item_count
+                item.warehouse_available[row.warehouse_name] = row.item_available
         connection.commit()
     return item
 
@@ -103,46 +334,265 @@ def get_item_by_id(engine, item_id: str):
 def get_items_list(engine):
     items: typing.List[Item] = []
     with engine.connect() as connection:
-        with open(f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/get_items.sql") as sql:
-            query = text(sql.read())
-            for row in connection.execute(query):
-                items.append(Item(**row._mapping))
+        for row in GET_ITEMS.execute(connection):
+            items.append(trusted(Item, dict(row._mapping)))
         connection.commit()
-    return ListItems(items=items)
+    return trusted(ListItems, {"items": items})
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_items(
+    engine,
+    query: typing.Optional[str],
+    code: typing.Optional[str],
+    cursor: typing.Optional[str],
+    limit: int,
+) -> ItemsSearchResult:
+    """
+    Substring search over name, manufacturer, model and description, and
+    exact search by one of the codes, at least one of them is required.
+    A code matches a few cards, which are collected through the GIN index
+    over the array and only then ordered by id. A pattern alone is left to
+    the planner: a broad one is served by walking the primary key and
+    stopping at the page, a narrow one by the trigram index.
+    """
+    if not query and not code:
+        raise helpers.get_bad_request("Укажите строку поиска или код")
+    items: typing.List[Item] = []
+    args = {
+        "pattern": f"%{_escape_like(query)}%" if query else None,
+        "cursor": cursor,
+        "limit": limit,
+    }
+    if code:
+        search, args = SEARCH_ITEMS_BY_CODE, {**args, "code": code}
+    else:
+        search = SEARCH_ITEMS
+    with engine.connect() as connection:
+        for row in search.execute(connection, args):
+            items.append(trusted(Item, dict(row._mapping)))
+        connection.commit()
+    return trusted(
+        ItemsSearchResult,
+        {"items": items, "cursor": items[-1].id if len(items) == limit else None},
+    )
 
 
 def get_items_by_warehouse(engine, warehouse_id: str):
-    items: typing.List[ItemWithCount] = []
+    items: typing.List[ItemWithStock] = []
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/get_item_count_by_warehouse.sql"
-        ) as sql:
-            query = text(sql.read())
-            for row in connection.execute(query, {"warehouse_id": warehouse_id}):
-                items.append(ItemWithCount(**row._mapping))
+        for row in GET_ITEM_COUNT_BY_WAREHOUSE.execute(
+            connection, {"warehouse_id": warehouse_id}
+        ):
+            items.append(trusted(ItemWithStock, dict(row._mapping)))
         connection.commit()
-    return ListItemsWithCount(items=items)
+    return trusted(ListItemsWithStock, {"items": items})
+
+
+# Warehouse id -> (stock version, serialized stock list).
+stock_cache = TTLCache(
+    maxsize=STOCK_CACHE_SIZE, ttl=STOCK_CACHE_TTL_SECONDS, name="stock"
+)
+
+
+def get_items_by_warehouse_json(engine, warehouse_id: str, version: int) -> bytes:
+    """
+    Serialized stock list of the warehouse at least as new as `version`,
+    reused until the version changes.
+    """
+    cached = stock_cache.get(warehouse_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    body = ListItemsWithStock.__pydantic_serializer__.to_json(
+        get_items_by_warehouse(engine, warehouse_id)
+    )
+    stock_cache.put(warehouse_id, (version, body))
+    return body
 
 
 def update_item(engine, new_item_data: UpdateItem):
     result: typing.Optional[Item] = None
-    with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/update_item.sql"
-        ) as sql:
-            query = text(sql.read())
+    with item_code_index.item_lock(new_item_data.id):
+        with engine.connect() as connection:
             args = new_item_data.model_dump()
-            for row in connection.execute(query, args):
+            for row in UPDATE_ITEM.execute(connection, args):
                 result = Item(**row._mapping)
-        connection.commit()
+            if result:
+                bump_stock_versions_by_item_transaction(connection, result.id)
+            connection.commit()
+        if result:
+            item_code_index.put(result)
+    if result:
+        report_generator.invalidate_all()
     return result
 
 
 def delete_item(engine, item_id: str):
+    with item_code_index.item_lock(item_id):
+        with engine.connect() as connection:
+            DELETE_ITEM.execute(connection, {"item_id": item_id})
+            bump_stock_versions_by_item_transaction(connection, item_id)
+            connection.commit()
+        item_code_index.remove(item_id)
+
+
+def get_items_by_codes(engine, codes: typing.List[str]) -> ItemsByCodes:
+    codes = list(dict.fromkeys(codes))
+    found, missing = item_code_index.lookup(codes)
+    code_lookups.inc("index", amount=len(codes) - len(missing))
+    if missing:
+        code_lookups.inc("database", amount=len(missing))
+        missing_codes = set(missing)
+        changes = item_code_index.changes
+        with engine.connect() as connection:
+            for row in GET_ITEMS_BY_CODES.execute(connection, {"codes": missing}):
+                item = Item(**row._mapping)
+                item_code_index.put_if_unchanged(item, changes)
+                for code in missing_codes.intersection(item.codes):
+                    found.setdefault(code, []).append(item)
+            connection.commit()
+    return ItemsByCodes(items={code: found.get(code, []) for code in codes})
+
+
+def _iter_import_records(
+    file: typing.BinaryIO, file_format: ItemImportFormat
+) -> typing.Iterator[typing.Tuple[int, typing.Any, typing.Optional[str]]]:
+    """
+    Yields (line number, raw record, error) triples, the error is set for
+    lines that could not be read into a record. In csv files codes are
+    separated by `;`, in ndjson files they are a list.
+    """
+    text_file = codecs.iterdecode(file, "utf-8-sig")
+    if file_format == ItemImportFormat.CSV:
+        reader = csv.DictReader(text_file)
+        for record in reader:
+            # DictReader puts values beyond the header under the None key.
+            if None in record:
+                yield reader.line_num, None, "В строке больше значений, чем колонок"
+                continue
+            codes = record.get("codes")
+            if codes is not None:
+                record["codes"] = [code for code in codes.split(";") if code]
+            yield reader.line_num, {
+                key: value for key, value in record.items() if value != ""
+            }, None
+        return
+    for line_number, line in enumerate(text_file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError as e:
+            yield line_number, None, f"Строка не является корректным JSON: {e}"
+
+
+def _parse_import_record(
+    record: typing.Any,
+) -> typing.Tuple[typing.Optional[ImportItem], typing.Optional[str]]:
+    if not isinstance(record, dict):
+        return None, "Строка не является объектом"
+    try:
+        item = ImportItem.model_validate(record)
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in details['loc'])}: {details['msg']}"
+            for details in e.errors()
+        )
+    empty = [field for field in ("id", "item_name") if not getattr(item, field)]
+    if empty:
+        return None, "; ".join(
+            f"{field}: Значение не может быть пустым" for field in empty
+        )
+    return item, None
+
+
+def _format_copy_row(values: typing.Iterable[typing.Optional[str]]) -> str:
+    """
+    Formats a row for COPY in text format, where NULL is written as \\N
+    and an empty string stays an empty string.
+    """
+    fields = []
+    for value in values:
+        if value is None:
+            fields.append("\\N")
+            continue
+        for character, escaped in _COPY_ESCAPES:
+            value = value.replace(character, escaped)
+        fields.append(value)
+    return "\t".join(fields) + "\n"
+
+
+def _copy_import_batch(connection, batch: io.StringIO) -> int:
+    return COPY_ITEMS_IMPORT.copy_from(
+        connection, io.BytesIO(batch.getvalue().encode("utf-8"))
+    )
+
+
+def import_items(
+    engine, file: typing.BinaryIO, file_format: ItemImportFormat
+) -> ItemImportResult:
+    """
+    Validated rows are copied into a temporary table in batches of
+    ITEM_IMPORT_BATCH_SIZE, so memory does not grow with the file, and then
+    merged into app.items at once. Ids that already exist are left as is,
+    which makes repeating an import safe.
+    """
+    total = 0
+    copied = 0
+    failed = 0
+    errors: typing.List[ItemImportError] = []
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/items/delete_item.sql"
-        ) as sql:
-            query = text(sql.read())
-            connection.execute(query, {"item_id": item_id})
+        CREATE_ITEMS_IMPORT_TABLE.execute(connection)
+        batch = io.StringIO()
+        batch_size = 0
+        try:
+            for line, record, detail in _iter_import_records(file, file_format):
+                total += 1
+                item = None
+                if detail is None:
+                    item, detail = _parse_import_record(record)
+                if item is None:
+                    failed += 1
+                    if len(errors) < ITEM_IMPORT_MAX_ERRORS:
+                        errors.append(ItemImportError(line=line, detail=detail))
+                    continue
+                batch.write(
+                    _format_copy_row(
+                        (
+                            str(line),
+                            item.id,
+                            item.item_name,
+                            item.item_type,
+                            item.manufacturer,
+                            item.model,
+                            item.description,
+                            json.dumps(item.codes),
+                        )
+                    )
+                )
+                batch_size += 1
+                if batch_size == ITEM_IMPORT_BATCH_SIZE:
+                    copied += _copy_import_batch(connection, batch)
+                    batch = io.StringIO()
+                    batch_size = 0
+        except (UnicodeDecodeError, csv.Error):
+            raise helpers.get_bad_request(
+                "Файл должен быть в формате UTF-8 " + file_format.value
+            )
+        if batch_size:
+            copied += _copy_import_batch(connection, batch)
+        created = MERGE_ITEMS_IMPORT.execute(connection).rowcount if copied else 0
         connection.commit()
+    logging.info(f"Imported {created} of {total} item cards")
+    if created and item_code_index.is_loaded:
+        item_code_index.load(engine)
+    return ItemImportResult(
+        total=total,
+        created=created,
+        existing=copied - created,
+        failed=failed,
+        errors=errors,
+    )
@@ -0,0 +1,7 @@
+DELETE FROM
+    app.stock_thresholds
+WHERE
+    warehouse_id = :warehouse_id
+    AND item_id = :item_id
+RETURNING
+    1;
@@ -0,0 +1,9 @@
+SELECT
+    a.warehouse_id,
+    a.item_id,
+    w.warehouse_name,
+    i.item_name
+FROM
+    UNNEST(CAST(:warehouse_ids AS TEXT []), CAST(:item_ids AS TEXT [])) AS a(warehouse_id, item_id)
+    LEFT JOIN app.warehouse AS w ON w.id = a.warehouse_id
+    LEFT JOIN app.items AS i ON i.id = a.item_id;
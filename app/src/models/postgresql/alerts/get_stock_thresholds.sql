@@ -0,0 +1,11 @@
+SELECT
+    warehouse_id,
+    item_id,
+    threshold
+FROM
+    app.stock_thresholds
+WHERE
+    :warehouse_id IS NULL OR warehouse_id = :warehouse_id
+ORDER BY
+    warehouse_id,
+    item_id;
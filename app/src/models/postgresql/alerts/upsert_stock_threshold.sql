@@ -0,0 +1,11 @@
+INSERT INTO
+    app.stock_thresholds (warehouse_id, item_id, threshold)
+VALUES
+    (:warehouse_id, :item_id, :threshold) ON CONFLICT (warehouse_id, item_id) DO
+UPDATE
+SET
+    threshold = EXCLUDED.threshold
+RETURNING
+    warehouse_id,
+    item_id,
+    threshold;
@@ -5,10 +5,8 @@ SET
     finished_by_id = :finished_by_id,
     updated_at = NOW()
 WHERE
-    application_id = :application_id
+    application_id = ANY(:application_ids)
     AND status = 'pending'
 RETURNING
-    sent_from_warehouse_id,
-    sent_to_warehouse_id,
-    type,
-    payload;
\ No newline at end of file
+    application_id,
+    updated_at;
\ No newline at end of file
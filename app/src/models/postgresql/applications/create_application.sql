@@ -44,5 +44,6 @@ RETURNING
     linked_to_application_id,
     payload,
     created_at,
-    updated_at
+    updated_at,
+    xmax = 0 AS is_created
 ;
@@ -1,15 +1,34 @@
 WITH update_dict AS (
     SELECT
-        unnest(:item_ids) AS item_id,
-        unnest(:counts) AS count
+        *
+    FROM
+        UNNEST(:warehouse_ids, :item_ids, :counts) AS u(warehouse_id, item_id, count)
+),
+deducted AS (
+    UPDATE
+        app.warehouse_to_items AS wti
+    SET
+        count = wti.count - upd.count
+    FROM
+        update_dict AS upd
+    WHERE
+        wti.warehouse_id = upd.warehouse_id
+        AND wti.item_id = upd.item_id
+        AND wti.count >= upd.count
+    RETURNING
+        wti.warehouse_id,
+        wti.item_id,
+        wti.count,
+        upd.count AS deducted
 )
-UPDATE
-    app.warehouse_to_items AS wti
-SET
-    count = wti.count - upd.count
+SELECT
+    d.warehouse_id,
+    d.item_id,
+    d.count,
+    d.deducted,
+    t.threshold
 FROM
-    update_dict AS upd
-WHERE
-    wti.warehouse_id = :warehouse_id
-    AND wti.item_id = upd.item_id
-    AND wti.count >= upd.count;
\ No newline at end of file
+    deducted AS d
+    LEFT JOIN app.stock_thresholds AS t
+        ON t.warehouse_id = d.warehouse_id
+        AND t.item_id = d.item_id;
@@ -7,4 +7,9 @@ SET
 WHERE
     application_id = :application_id
     AND status = 'pending'
+RETURNING
+    sent_from_warehouse_id,
+    sent_to_warehouse_id,
+    type,
+    payload
 ;
\ No newline at end of file
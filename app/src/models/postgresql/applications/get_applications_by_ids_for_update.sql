@@ -0,0 +1,15 @@
+SELECT
+    application_id as id,
+    status,
+    type,
+    sent_from_warehouse_id,
+    sent_to_warehouse_id,
+    payload,
+    updated_at
+FROM
+    app.applications
+WHERE
+    application_id = ANY(:application_ids)
+ORDER BY
+    application_id
+FOR UPDATE;
\ No newline at end of file
@@ -15,11 +15,14 @@ SELECT
 FROM
     app.applications
 WHERE
-    created_at < COALESCE(:cursor, NOW())
+    (created_at, application_id) < (
+        COALESCE(:cursor_created_at, NOW()),
+        COALESCE(:cursor_application_id, '')
+    )
     AND
     (:chained_to_user_id IS NULL OR :chained_to_user_id = created_by_id)
     AND
     (:status_filter IS NULL OR status = :status_filter)
-ORDER BY created_at DESC
+ORDER BY created_at DESC, application_id DESC
 LIMIT :limit
 ;
\ No newline at end of file
@@ -0,0 +1,13 @@
+SELECT
+    wti.warehouse_id,
+    wti.item_id,
+    wti.count
+FROM
+    app.warehouse_to_items AS wti
+    JOIN UNNEST(:warehouse_ids, :item_ids) AS s(warehouse_id, item_id)
+        ON wti.warehouse_id = s.warehouse_id
+        AND wti.item_id = s.item_id
+ORDER BY
+    wti.warehouse_id,
+    wti.item_id
+FOR UPDATE OF wti;
\ No newline at end of file
@@ -0,0 +1,22 @@
+INSERT INTO
+    app.inventory_movements (
+        application_id,
+        warehouse_id,
+        item_id,
+        delta,
+        created_at
+    )
+SELECT
+    m.application_id,
+    m.warehouse_id,
+    m.item_id,
+    m.delta,
+    m.created_at
+FROM
+    UNNEST(
+        :application_ids,
+        :warehouse_ids,
+        :item_ids,
+        :deltas,
+        :created_ats
+    ) AS m(application_id, warehouse_id, item_id, delta, created_at);
\ No newline at end of file
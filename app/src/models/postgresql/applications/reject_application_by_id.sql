@@ -8,4 +8,7 @@ WHERE
     application_id = :application_id
     AND status = 'pending'
 RETURNING
-    1;
\ No newline at end of file
+    sent_from_warehouse_id,
+    sent_to_warehouse_id,
+    type,
+    payload;
\ No newline at end of file
@@ -0,0 +1,11 @@
+UPDATE
+    app.applications
+SET
+    status = 'rejected',
+    finished_by_id = :finished_by_id,
+    updated_at = NOW()
+WHERE
+    application_id = ANY(:application_ids)
+    AND status = 'pending'
+RETURNING
+    application_id;
\ No newline at end of file
@@ -0,0 +1,9 @@
+INSERT INTO
+    app.warehouse_reservations (warehouse_id, item_id, reserved)
+SELECT
+    *
+FROM
+    UNNEST(:warehouse_ids, :item_ids, :deltas) ON CONFLICT (warehouse_id, item_id) DO
+UPDATE
+SET
+    reserved = app.warehouse_reservations.reserved + EXCLUDED.reserved;
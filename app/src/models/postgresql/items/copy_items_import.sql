@@ -0,0 +1,12 @@
+COPY items_import (
+    line,
+    id,
+    item_name,
+    item_type,
+    manufacturer,
+    model,
+    description,
+    codes
+)
+FROM
+    STDIN WITH (FORMAT text, ENCODING 'UTF8');
@@ -0,0 +1,10 @@
+CREATE TEMPORARY TABLE items_import (
+    line BIGINT NOT NULL,
+    id TEXT NOT NULL,
+    item_name TEXT NOT NULL,
+    item_type TEXT,
+    manufacturer TEXT,
+    model TEXT,
+    description TEXT,
+    codes TEXT NOT NULL
+) ON COMMIT DROP;
@@ -1,8 +1,11 @@
 SELECT
     w.warehouse_name as warehouse_name,
-    m.count as item_count
+    m.count as item_count,
+    m.count - COALESCE(r.reserved, 0) as item_available
 FROM
     app.warehouse_to_items as m LEFT JOIN app.warehouse as w ON m.warehouse_id=w.id
+    LEFT JOIN app.warehouse_reservations as r
+        ON r.warehouse_id=m.warehouse_id AND r.item_id=m.item_id
 WHERE
     m.item_id = :item_id
     AND NOT w.is_deleted;
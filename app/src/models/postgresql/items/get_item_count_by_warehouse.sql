@@ -6,9 +6,12 @@ SELECT
     i.model as model,
     i.description as description,
     i.codes as codes,
-    m.count as count
+    m.count as count,
+    m.count - COALESCE(r.reserved, 0) as available
 FROM
     app.warehouse_to_items as m LEFT JOIN app.items as i ON m.item_id=i.id
+    LEFT JOIN app.warehouse_reservations as r
+        ON r.warehouse_id=m.warehouse_id AND r.item_id=m.item_id
 WHERE
     m.warehouse_id = :warehouse_id
     AND NOT i.is_deleted;
@@ -0,0 +1,14 @@
+SELECT
+    id,
+    item_name,
+    item_type,
+    manufacturer,
+    model,
+    description,
+    codes
+FROM
+    app.items
+WHERE
+    NOT is_deleted
+    AND codes && CAST(:codes AS TEXT [])
+;
@@ -0,0 +1,31 @@
+INSERT INTO
+    app.items (
+        id,
+        item_name,
+        item_type,
+        manufacturer,
+        model,
+        description,
+        codes,
+        created_at,
+        updated_at
+    )
+SELECT
+    DISTINCT ON (id) id,
+    item_name,
+    item_type,
+    manufacturer,
+    model,
+    description,
+    ARRAY(
+        SELECT
+            jsonb_array_elements_text(codes::JSONB)
+    ),
+    NOW(),
+    NOW()
+FROM
+    items_import
+ORDER BY
+    id,
+    line
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,20 @@
+SELECT
+    id,
+    item_name,
+    item_type,
+    manufacturer,
+    model,
+    description,
+    codes
+FROM
+    app.items
+WHERE
+    NOT is_deleted
+    AND (
+        item_name || ' ' || COALESCE(manufacturer, '') || ' ' || COALESCE(model, '') || ' ' || COALESCE(description, '')
+    ) ILIKE :pattern
+    AND id > COALESCE(:cursor, '')
+ORDER BY
+    id
+LIMIT
+    :limit;
@@ -0,0 +1,31 @@
+WITH matches AS MATERIALIZED (
+    SELECT
+        id,
+        item_name,
+        item_type,
+        manufacturer,
+        model,
+        description,
+        codes
+    FROM
+        app.items
+    WHERE
+        NOT is_deleted
+        AND codes @> ARRAY [CAST(:code AS TEXT)]
+)
+SELECT
+    *
+FROM
+    matches
+WHERE
+    (
+        CAST(:pattern AS TEXT) IS NULL
+        OR (
+            item_name || ' ' || COALESCE(manufacturer, '') || ' ' || COALESCE(model, '') || ' ' || COALESCE(description, '')
+        ) ILIKE :pattern
+    )
+    AND id > COALESCE(:cursor, '')
+ORDER BY
+    id
+LIMIT
+    :limit;
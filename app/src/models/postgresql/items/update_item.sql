@@ -10,6 +10,7 @@ SET
     updated_at = NOW()
 WHERE
     id = :id
+    AND NOT is_deleted
 RETURNING
     id,
     item_name,
@@ -0,0 +1,54 @@
+WITH totals AS (
+    SELECT
+        CASE
+            WHEN :period IS NOT NULL THEN date_trunc(
+                CAST(:period AS TEXT),
+                a.updated_at AT TIME ZONE 'Europe/Moscow'
+            )
+        END AS period_start,
+        CASE
+            WHEN :by_item THEN p.item_id
+        END AS item_id,
+        CASE
+            WHEN :by_warehouse THEN (
+                CASE
+                    WHEN a.type = 'recieve' THEN a.sent_to_warehouse_id
+                    ELSE a.sent_from_warehouse_id
+                END
+            )
+        END AS warehouse_id,
+        SUM(p.count::BIGINT) FILTER (WHERE a.type = 'recieve') AS deposited,
+        SUM(p.count::BIGINT) FILTER (WHERE a.type != 'recieve') AS deducted
+    FROM
+        app.applications AS a
+        CROSS JOIN LATERAL jsonb_each_text(a.payload) AS p(item_id, count)
+    WHERE
+        a.status = 'success'
+        AND
+        a.updated_at <= :to_date
+        AND
+        a.updated_at >= :from_date
+    GROUP BY
+        1,
+        2,
+        3
+)
+SELECT
+    t.period_start AS period_start,
+    i.manufacturer AS manufacturer,
+    i.model AS model,
+    w.warehouse_name AS warehouse_name,
+    COALESCE(t.deposited, 0)::BIGINT AS deposited,
+    COALESCE(t.deducted, 0)::BIGINT AS deducted
+FROM
+    totals AS t
+    LEFT JOIN app.items AS i ON i.id = t.item_id
+    LEFT JOIN app.warehouse AS w ON w.id = t.warehouse_id
+ORDER BY
+    t.period_start ASC,
+    i.manufacturer ASC,
+    i.model ASC,
+    t.item_id ASC,
+    w.warehouse_name ASC,
+    t.warehouse_id ASC
+;
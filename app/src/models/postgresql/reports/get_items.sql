@@ -1,8 +0,0 @@
-SELECT 
-    id,
-    manufacturer,
-    model
-FROM
-    app.items
-WHERE 
-    id = ANY(:ids);
@@ -0,0 +1,28 @@
+SELECT
+    i.manufacturer AS manufacturer,
+    i.model AS model,
+    p.count::BIGINT AS count,
+    w.warehouse_name AS warehouse_name,
+    a.type = 'recieve' AS is_deposit,
+    a.updated_at AS updated_at
+FROM
+    app.applications AS a
+    CROSS JOIN LATERAL jsonb_each_text(a.payload) AS p(item_id, count)
+    LEFT JOIN app.items AS i ON i.id = p.item_id
+    LEFT JOIN app.warehouse AS w ON w.id = (
+        CASE
+            WHEN a.type = 'recieve' THEN a.sent_to_warehouse_id
+            ELSE a.sent_from_warehouse_id
+        END
+    )
+WHERE
+    a.status = 'success'
+    AND
+    a.updated_at <= :to_date
+    AND
+    a.updated_at >= :from_date
+ORDER BY
+    a.updated_at ASC,
+    a.application_id ASC,
+    p.item_id ASC
+;
@@ -1,8 +0,0 @@
-SELECT
-    id,
-    warehouse_name
-FROM
-    app.warehouse
-WHERE
-    id = ANY(:ids)
-;
\ No newline at end of file
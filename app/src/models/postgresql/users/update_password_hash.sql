@@ -0,0 +1,7 @@
+UPDATE
+    app.users
+SET
+    password_hash = :password_hash
+WHERE
+    username = :username
+    AND password_hash = :old_password_hash;
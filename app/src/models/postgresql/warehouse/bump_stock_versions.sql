@@ -0,0 +1,16 @@
+INSERT INTO
+    app.warehouse_stock_versions (warehouse_id, version)
+SELECT
+    warehouse_id,
+    1
+FROM
+    (
+        SELECT
+            DISTINCT UNNEST(CAST(:warehouse_ids AS TEXT [])) AS warehouse_id
+    ) AS w
+ORDER BY
+    warehouse_id
+ON CONFLICT (warehouse_id) DO
+UPDATE
+SET
+    version = app.warehouse_stock_versions.version + 1;
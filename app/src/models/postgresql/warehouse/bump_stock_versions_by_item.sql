@@ -0,0 +1,15 @@
+INSERT INTO
+    app.warehouse_stock_versions (warehouse_id, version)
+SELECT
+    warehouse_id,
+    1
+FROM
+    app.warehouse_to_items
+WHERE
+    item_id = :item_id
+ORDER BY
+    warehouse_id
+ON CONFLICT (warehouse_id) DO
+UPDATE
+SET
+    version = app.warehouse_stock_versions.version + 1;
@@ -0,0 +1,8 @@
+SELECT
+    id,
+    warehouse_name,
+    address
+FROM
+    app.warehouse
+WHERE
+    id = ANY(:ids);
@@ -0,0 +1,6 @@
+SELECT
+    version
+FROM
+    app.warehouse_stock_versions
+WHERE
+    warehouse_id = :warehouse_id;
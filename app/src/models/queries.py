@@ -0,0 +1,130 @@
+import logging
+import os
+import time
+import typing
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+from ..utils.metrics import ROW_COUNT_BUCKETS, Counter, Histogram
+
+query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Time to execute a statement, by its sql file",
+    labelnames=("query",),
+)
+query_rows = Histogram(
+    "db_query_rows",
+    "Rows returned or affected by a statement, by its sql file",
+    labelnames=("query",),
+    buckets=ROW_COUNT_BUCKETS,
+)
+query_errors = Counter(
+    "db_query_errors_total",
+    "Statements that raised an error, by their sql file",
+    labelnames=("query",),
+)
+
+
+class Query:
+    def __init__(self, name: str, params: typing.Iterable[str]):
+        self.name = name
+        self.params = frozenset(params)
+        self.clause: typing.Optional[TextClause] = None
+
+    def execute(self, connection, args: typing.Optional[typing.Mapping] = None):
+        if self.clause is None:
+            raise RuntimeError(f"Query {self.name} is not loaded")
+        started_at = time.perf_counter()
+        try:
+            if args is None:
+                result = connection.execute(self.clause)
+            else:
+                result = connection.execute(self.clause, args)
+        except Exception:
+            query_errors.inc(self.name)
+            raise
+        finally:
+            query_duration.observe(time.perf_counter() - started_at, self.name)
+        # Streamed results do not know their size up front.
+        if result.rowcount >= 0:
+            query_rows.observe(result.rowcount, self.name)
+        return result
+
+    def copy_from(self, connection, file: typing.IO) -> int:
+        """
+        Runs a `COPY ... FROM STDIN` statement of the file with the data read
+        from `file`, inside the transaction of `connection`.
+        """
+        if self.clause is None:
+            raise RuntimeError(f"Query {self.name} is not loaded")
+        started_at = time.perf_counter()
+        try:
+            with connection.connection.dbapi_connection.cursor() as cursor:
+                cursor.copy_expert(self.clause.text, file)
+                rowcount = cursor.rowcount
+        except Exception:
+            query_errors.inc(self.name)
+            raise
+        finally:
+            query_duration.observe(time.perf_counter() - started_at, self.name)
+        query_rows.observe(rowcount, self.name)
+        return rowcount
+
+
+class QueryRegistry:
+    """
+    Holds every statement from the postgresql directory compiled once.
+    Models declare the queries they use at import time and `load` verifies
+    that each declared file exists and takes exactly the declared binds.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._declared: typing.Dict[str, Query] = {}
+        self._clauses: typing.Dict[str, TextClause] = {}
+        self.is_loaded = False
+
+    def declare(self, name: str, *params: str) -> Query:
+        if name in self._declared:
+            query = self._declared[name]
+            if query.params != frozenset(params):
+                raise ValueError(f"Query {name} is declared with different params")
+            return query
+        query = Query(name, params)
+        self._declared[name] = query
+        if self.is_loaded:
+            self._bind(query)
+        return query
+
+    def load(self):
+        clauses: typing.Dict[str, TextClause] = {}
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if not file_name.endswith(".sql"):
+                    continue
+                path = os.path.join(root, file_name)
+                name = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                with open(path) as sql:
+                    clauses[name] = text(sql.read())
+        self._clauses = clauses
+        for query in self._declared.values():
+            self._bind(query)
+        self.is_loaded = True
+        logging.info(f"Loaded {len(clauses)} sql statements")
+
+    def _bind(self, query: Query):
+        clause = self._clauses.get(query.name)
+        if clause is None:
+            raise RuntimeError(f"Missing sql file {self.directory}/{query.name}")
+        bind_params = frozenset(clause._bindparams.keys())
+        if bind_params != query.params:
+            raise RuntimeError(
+                f"Bind params of {query.name} do not match declaration: "
+                f"expected {sorted(query.params)}, got {sorted(bind_params)}"
+            )
+        query.clause = clause
+
+
+query_registry = QueryRegistry(BASE_POSTGRES_TRANSACTIONS_DIRECTORY)
@@ -0,0 +1,248 @@
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum
+import glob
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import typing
+import uuid
+
+from pydantic import BaseModel
+
+from ..constants import (
+    REPORT_JOB_MAX_PENDING,
+    REPORT_JOB_MAX_RESULTS,
+    REPORT_JOB_RETENTION_SECONDS,
+)
+from ..models import helpers
+from ..models.queries import query_registry
+from ..models.reports import (
+    Interval,
+    ReportDimension,
+    ReportFileFormat,
+    get_report_period,
+    report_generator,
+)
+from ..utils import report_files
+
+DEFAULT_REPORT_JOB_WORKERS = 2
+REPORT_FILE_PREFIX = "report-"
+
+
+class ReportJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJobRequest(BaseModel):
+    interval: Interval
+    file_format: ReportFileFormat = ReportFileFormat.XLSX
+    group_by: typing.Optional[typing.List[ReportDimension]] = None
+
+
+class ReportJob(BaseModel):
+    id: str
+    status: ReportJobStatus
+    file_format: ReportFileFormat
+    created_at: datetime
+    finished_at: typing.Optional[datetime] = None
+    detail: typing.Optional[str] = None
+
+
+def _init_worker():
+    query_registry.load()
+    # Invalidations happen in the app process, so a worker would keep
+    # stale days.
+    report_generator.day_cache = None
+
+
+def _write_report_file(
+    interval: Interval,
+    group_by: typing.Optional[typing.List[ReportDimension]],
+    file_format: ReportFileFormat,
+    path: str,
+):
+    """
+    Runs in a worker process. The file is written next to its final path
+    and renamed, so a finished job never points at a partial file.
+    """
+    header = report_generator.get_header(group_by)
+    rows = report_generator.iter_report_rows(interval, group_by)
+    partial_path = f"{path}.partial"
+    try:
+        with open(partial_path, "wb") as file:
+            if file_format == ReportFileFormat.CSV:
+                for chunk in report_files.iter_csv(header, rows):
+                    file.write(chunk)
+            else:
+                report_files.write_xlsx(header, rows, file)
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+
+class _Job:
+    def __init__(self, key: tuple, file_format: ReportFileFormat, directory: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.file_format = file_format
+        self.path = os.path.join(
+            directory, f"{REPORT_FILE_PREFIX}{self.id}.{file_format.value}"
+        )
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: typing.Optional[datetime] = None
+        self.expires_at: typing.Optional[float] = None
+        self.future: typing.Optional[Future] = None
+        self.error: typing.Optional[str] = None
+
+    def get_status(self) -> ReportJobStatus:
+        if self.finished_at is None:
+            if self.future is not None and self.future.running():
+                return ReportJobStatus.RUNNING
+            return ReportJobStatus.PENDING
+        if self.error is not None:
+            return ReportJobStatus.FAILED
+        return ReportJobStatus.DONE
+
+    def to_model(self) -> ReportJob:
+        return ReportJob(
+            id=self.id,
+            status=self.get_status(),
+            file_format=self.file_format,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+            detail=self.error,
+        )
+
+
+class ReportJobs:
+    """
+    Builds report files in a bounded pool of worker processes, so that long
+    intervals hold neither a request thread nor its connection. Finished
+    files stay in `directory` for REPORT_JOB_RETENTION_SECONDS, at most
+    REPORT_JOB_MAX_RESULTS of them. Jobs live in memory of the app process:
+    a restart forgets them and removes their files.
+    """
+
+    def __init__(self, directory: str, workers: int):
+        self.directory = directory
+        self.workers = workers
+        self._jobs: typing.Dict[str, _Job] = {}
+        self._in_flight: typing.Dict[tuple, _Job] = {}
+        self._lock = threading.Lock()
+        self._pool: typing.Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            os.makedirs(self.directory, exist_ok=True)
+            for path in glob.glob(
+                os.path.join(self.directory, f"{REPORT_FILE_PREFIX}*")
+            ):
+                os.remove(path)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    def stop(self):
+        """
+        Cancels jobs that have not started and waits for running ones.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, request: ReportJobRequest) -> ReportJob:
+        if request.group_by:
+            get_report_period(request.group_by)
+        key = (
+            request.interval.from_date,
+            request.interval.to_date,
+            frozenset(request.group_by or ()),
+            request.file_format,
+        )
+        with self._lock:
+            self._remove_expired()
+            job = self._in_flight.get(key)
+            if job is not None:
+                return job.to_model()
+            if len(self._in_flight) >= REPORT_JOB_MAX_PENDING:
+                raise helpers.get_bad_request(
+                    "Слишком много отчетов в очереди, попробуйте позже"
+                )
+            pool = self._get_pool()
+            job = _Job(key, request.file_format, self.directory)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            job.future = pool.submit(
+                _write_report_file,
+                request.interval,
+                request.group_by,
+                request.file_format,
+                job.path,
+            )
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        logging.info(f"Submitted report job {job.id}")
+        return job.to_model()
+
+    def _finish(self, job: _Job, future: Future):
+        error = CancelledError() if future.cancelled() else future.exception()
+        with self._lock:
+            if error is not None:
+                job.error = "Не удалось построить отчет"
+                logging.error(f"Report job {job.id} failed: {error!r}")
+            job.finished_at = datetime.now(timezone.utc)
+            job.expires_at = time.monotonic() + REPORT_JOB_RETENTION_SECONDS
+            self._in_flight.pop(job.key, None)
+
+    def _remove_expired(self):
+        finished = sorted(
+            (job for job in self._jobs.values() if job.expires_at is not None),
+            key=lambda job: job.expires_at,
+        )
+        now = time.monotonic()
+        overflow = len(finished) - REPORT_JOB_MAX_RESULTS
+        for index, job in enumerate(finished):
+            if index >= overflow and job.expires_at > now:
+                break
+            del self._jobs[job.id]
+            if os.path.exists(job.path):
+                os.remove(job.path)
+
+    def get(self, id: str) -> typing.Optional[ReportJob]:
+        with self._lock:
+            self._remove_expired()
+            job = self._jobs.get(id)
+            return job.to_model() if job is not None else None
+
+    def get_file_path(self, id: str) -> str:
+        with self._lock:
+            self._remove_expired()
+            job = self._jobs.get(id)
+            if job is None:
+                raise helpers.NOT_FOUND_ERROR
+            status = job.get_status()
+            if status == ReportJobStatus.FAILED:
+                raise helpers.get_bad_request(job.error)
+            if status != ReportJobStatus.DONE:
+                raise helpers.get_bad_request("Отчет еще не готов")
+            return job.path
+
+
+report_jobs = ReportJobs(
+    os.environ.get(
+        "REPORT_JOBS_DIRECTORY", os.path.join(tempfile.gettempdir(), "osc-reports")
+    ),
+    int(os.environ.get("REPORT_JOB_WORKERS", DEFAULT_REPORT_JOB_WORKERS)),
+)
@@ -1,19 +1,48 @@
-from datetime import datetime
+import bisect
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
 import logging
+import threading
 import typing
 
 from pydantic import BaseModel
 
-import pytz
-
-from sqlalchemy import text
-
-from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+from ..constants import (
+    REPORT_DAY_CACHE_SIZE,
+    REPORT_DAY_CACHE_TTL_SECONDS,
+    REPORT_STREAM_BATCH_SIZE,
+)
+from ..utils.cache import TTLCache
+from ..utils.serialization import trusted
+from ..utils.report_frames import (
+    MOSCOW_TIMEZONE,
+    REPORT_DATE_FORMAT,
+    REPORT_TIME_FORMAT,
+    build_raw_frame,
+    format_report_frame,
+    frame_to_rows,
+)
 
+from . import helpers
 from .connector import db_connector
-from .applications import ApplicationType
+from .queries import query_registry
+
+GET_AGGREGATED_REPORT = query_registry.declare(
+    "reports/get_aggregated_report.sql",
+    "from_date",
+    "to_date",
+    "period",
+    "by_item",
+    "by_warehouse",
+)
+GET_REPORT_ROWS = query_registry.declare(
+    "reports/get_report_rows.sql", "from_date", "to_date"
+)
 
-MOSCOW_TIMEZONE = pytz.timezone("Europe/Moscow")
+# Timestamps in postgres have microsecond precision, so a day ends one
+# microsecond before the next one for the inclusive bounds of
+# reports/get_report_rows.sql.
+_MICROSECOND = timedelta(microseconds=1)
 
 
 class Interval(BaseModel):
@@ -21,8 +50,23 @@ class Interval(BaseModel):
     to_date: datetime
 
 
+class ReportFileFormat(str, Enum):
+    XLSX = "xlsx"
+    CSV = "csv"
+
+
+class ReportDimension(str, Enum):
+    ITEM = "item"
+    WAREHOUSE = "warehouse"
+    DAY = "day"
+    WEEK = "week"
+
+
 class ReportRequest(BaseModel):
     interval: Interval
+    # Totals of deposited and deducted items per combination of these
+    # instead of a row per payload line.
+    group_by: typing.Optional[typing.List[ReportDimension]] = None
 
 
 class Report(BaseModel):
@@ -30,19 +74,96 @@ class Report(BaseModel):
     items: typing.List[tuple]
 
 
-class RawRow(BaseModel):
-    warehouse_id: str
-    item_id: str
-    count: int
-    deposited_at: typing.Optional[datetime] = None
-    deducted_at: typing.Optional[datetime] = None
+def get_report_period(
+    group_by: typing.List[ReportDimension],
+) -> typing.Optional[ReportDimension]:
+    if ReportDimension.DAY in group_by and ReportDimension.WEEK in group_by:
+        raise helpers.get_bad_request(
+            "Можно сгруппировать либо по дням, либо по неделям"
+        )
+    for period in (ReportDimension.DAY, ReportDimension.WEEK):
+        if period in group_by:
+            return period
+    return None
+
+
+def _get_day_start(day: date) -> datetime:
+    return MOSCOW_TIMEZONE.localize(datetime.combine(day, time.min))
+
+
+def _as_aware(moment: datetime) -> datetime:
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+def _add_part(parts: list, start: datetime, end: datetime, day: typing.Optional[date]):
+    if parts and (parts[-1][2] is None) == (day is None):
+        previous_start, _, days = parts[-1]
+        if day is not None:
+            days.append(day)
+        parts[-1] = (previous_start, end, days)
+    else:
+        parts.append((start, end, None if day is None else [day]))
+
+
+def _split_interval(
+    interval: Interval, now: datetime
+) -> typing.List[typing.Tuple[datetime, datetime, typing.Optional[typing.List[date]]]]:
+    """
+    Splits the interval into (from, to, days) parts in order. Runs of whole
+    Moscow days among the last REPORT_DAY_CACHE_SIZE ones that are over by
+    `now` come with their days, everything else comes as live ranges with
+    days set to None.
+    """
+    from_date = _as_aware(interval.from_date)
+    to_date = _as_aware(interval.to_date)
+    today = now.astimezone(MOSCOW_TIMEZONE).date()
+    today_start = _get_day_start(today)
+    oldest_start = _get_day_start(today - timedelta(days=REPORT_DAY_CACHE_SIZE))
+    parts: list = []
+    start = from_date
+    if start < oldest_start:
+        _add_part(parts, start, min(to_date, oldest_start - _MICROSECOND), None)
+        start = oldest_start
+    while start <= to_date and start < today_start:
+        day = start.astimezone(MOSCOW_TIMEZONE).date()
+        next_day_start = _get_day_start(day + timedelta(days=1))
+        end = min(to_date, next_day_start - _MICROSECOND)
+        is_whole = start == _get_day_start(day) and end == next_day_start - _MICROSECOND
+        _add_part(parts, start, end, day if is_whole else None)
+        start = next_day_start
+    if start <= to_date:
+        _add_part(parts, start, to_date, None)
+    return parts
 
 
 class ReportGenerator:
+    """
+    Successful applications are final, so report rows of a Moscow day that
+    is over only change when an approval that started before midnight
+    commits after it or when an item card or a warehouse is renamed, and
+    both invalidate the cache. Rows of such days are cached by day and an
+    interval is answered from the cached days plus live queries for its
+    edges and the current day.
+
+    The cache lives in memory of the process, the app runs one worker and
+    report job processes do not use it.
+    """
+
     def __init__(self, engine):
         self.engine = engine
+        self.day_cache: typing.Optional[TTLCache] = TTLCache(
+            REPORT_DAY_CACHE_SIZE, REPORT_DAY_CACHE_TTL_SECONDS, name="report_days"
+        )
+        # Bumped by every invalidation, so that rows read before it are not
+        # put into the cache after it.
+        self._generation = 0
+        self._lock = threading.Lock()
 
-    def _get_header(self) -> tuple:
+    def get_header(
+        self, group_by: typing.Optional[typing.List[ReportDimension]] = None
+    ) -> tuple:
+        if group_by:
+            return self._get_aggregated_header(group_by)
         return (
             "Производитель",
             "Модель",
@@ -52,92 +173,186 @@ class ReportGenerator:
             "Дата списания",
         )
 
-    def _get_raw_data(
-        self, interval: Interval, connection
-    ) -> typing.Tuple[typing.List[RawRow], typing.List[str], typing.List[str]]:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/reports/get_payload.sql"
-        ) as sql:
-            query = text(sql.read())
-            db_applications = connection.execute(query, interval.model_dump()).all()
-            item_ids = set()
-            warehouse_ids = set()
-            for row in db_applications:
-                item_ids.update(list(row.payload.keys()))
-                warehouse_ids.update(
-                    [row.sent_from_warehouse_id, row.sent_to_warehouse_id]
-                )
-            result = []
-            for row in db_applications:
-                result.extend(
-                    [
-                        RawRow(
-                            warehouse_id=row.sent_to_warehouse_id
-                            if row.type == ApplicationType.RECIEVE
-                            else row.sent_from_warehouse_id,
-                            item_id=key,
-                            count=value,
-                            deposited_at=row.updated_at
-                            if row.type == ApplicationType.RECIEVE
-                            else None,
-                            deducted_at=row.updated_at
-                            if row.type != ApplicationType.RECIEVE
-                            else None,
-                        )
-                        for key, value in row.payload.items()
-                    ]
+    def _get_aggregated_header(self, group_by: typing.List[ReportDimension]) -> tuple:
+        header = []
+        period = get_report_period(group_by)
+        if period == ReportDimension.DAY:
+            header.append("День")
+        elif period == ReportDimension.WEEK:
+            header.append("Неделя")
+        if ReportDimension.ITEM in group_by:
+            header.extend(("Производитель", "Модель"))
+        if ReportDimension.WAREHOUSE in group_by:
+            header.append("Склад")
+        return (*header, "Поступило", "Списано")
+
+    def prepare_aggregated_rows(
+        self, interval: Interval, group_by: typing.List[ReportDimension]
+    ) -> typing.List[tuple]:
+        """
+        Totals are summed by postgres, so only one row per group is read.
+        Columns of the dimensions that are not grouped by are left out.
+        """
+        period = get_report_period(group_by)
+        by_item = ReportDimension.ITEM in group_by
+        by_warehouse = ReportDimension.WAREHOUSE in group_by
+        with self.engine.connect() as connection:
+            rows = GET_AGGREGATED_REPORT.execute(
+                connection,
+                {
+                    "from_date": interval.from_date,
+                    "to_date": interval.to_date,
+                    "period": period.value if period else None,
+                    "by_item": by_item,
+                    "by_warehouse": by_warehouse,
+                },
+            ).all()
+            connection.commit()
+        result = []
+        for row in rows:
+            values = []
+            if period:
+                values.append(row.period_start.strftime(REPORT_DATE_FORMAT))
+            if by_item:
+                values.extend((row.manufacturer, row.model))
+            if by_warehouse:
+                values.append(row.warehouse_name)
+            result.append((*values, row.deposited, row.deducted))
+        return result
+
+    def invalidate_days(self, moments: typing.Iterable[datetime]):
+        days = {moment.astimezone(MOSCOW_TIMEZONE).date() for moment in moments}
+        if not days or self.day_cache is None:
+            return
+        with self._lock:
+            self._generation += 1
+            for day in days:
+                self.day_cache.invalidate(day)
+
+    def invalidate_all(self):
+        if self.day_cache is None:
+            return
+        with self._lock:
+            self._generation += 1
+            self.day_cache.clear()
+
+    def _read_rows(
+        self, connection, from_date: datetime, to_date: datetime
+    ) -> typing.Tuple[typing.List[datetime], typing.List[tuple]]:
+        raw = GET_REPORT_ROWS.execute(
+            connection, {"from_date": from_date, "to_date": to_date}
+        ).all()
+        return (
+            [row.updated_at for row in raw],
+            frame_to_rows(format_report_frame(build_raw_frame(raw))),
+        )
+
+    def _get_days(
+        self, connection, days: typing.List[date]
+    ) -> typing.List[typing.List[tuple]]:
+        """
+        Rows of every given day, consecutive ones missing from the cache
+        are read with one query and put into it.
+        """
+        result = [self.day_cache.get(day) for day in days]
+        index = 0
+        while index < len(days):
+            if result[index] is not None:
+                index += 1
+                continue
+            end = index
+            while end < len(days) and result[end] is None:
+                end += 1
+            with self._lock:
+                generation = self._generation
+            updated_ats, rows = self._read_rows(
+                connection,
+                _get_day_start(days[index]),
+                _get_day_start(days[end - 1] + timedelta(days=1)) - _MICROSECOND,
+            )
+            first = 0
+            for position in range(index, end):
+                last = bisect.bisect_left(
+                    updated_ats, _get_day_start(days[position] + timedelta(days=1))
                 )
-            return result, list(item_ids), list(warehouse_ids)
-
-    def _get_items_data(self, item_ids: typing.List[str], connection):
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/reports/get_items.sql"
-        ) as sql:
-            query = text(sql.read())
-            return connection.execute(query, {"ids": item_ids}).all()
-
-    def _get_warehouses_data(self, warehouse_ids: typing.List[str], connection):
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/reports/get_warehouses.sql"
-        ) as sql:
-            query = text(sql.read())
-            return connection.execute(query, {"ids": warehouse_ids}).all()
-
-    def prepare_report(self, interval: Interval):
+                result[position] = rows[first:last]
+                first = last
+            with self._lock:
+                if generation == self._generation:
+                    for position in range(index, end):
+                        self.day_cache.put(days[position], result[position])
+            index = end
+        return result
+
+    def _split_interval(self, interval: Interval):
+        if self.day_cache is None:
+            return [(interval.from_date, interval.to_date, None)]
+        return _split_interval(interval, datetime.now(timezone.utc))
+
+    def prepare_report(
+        self,
+        interval: Interval,
+        group_by: typing.Optional[typing.List[ReportDimension]] = None,
+    ):
+        if group_by:
+            return trusted(
+                Report,
+                {
+                    "header": self.get_header(group_by),
+                    "items": self.prepare_aggregated_rows(interval, group_by),
+                },
+            )
+        items = []
         with self.engine.connect() as connection:
-            rows, item_ids, warehouse_ids = self._get_raw_data(interval, connection)
-            items = {
-                item.id: (item.manufacturer, item.model)
-                for item in self._get_items_data(item_ids, connection)
-            }
-            warehouses = {
-                warehouse.id: warehouse.warehouse_name
-                for warehouse in self._get_warehouses_data(warehouse_ids, connection)
-            }
+            for from_date, to_date, days in self._split_interval(interval):
+                if days is None:
+                    items.extend(self._read_rows(connection, from_date, to_date)[1])
+                    continue
+                for rows in self._get_days(connection, days):
+                    items.extend(rows)
             connection.commit()
+        return trusted(Report, {"header": self.get_header(), "items": items})
+
+    def iter_report_rows(
+        self,
+        interval: Interval,
+        group_by: typing.Optional[typing.List[ReportDimension]] = None,
+    ) -> typing.Iterator[tuple]:
+        if group_by:
+            yield from self.prepare_aggregated_rows(interval, group_by)
+            return
+        for from_date, to_date, days in self._split_interval(interval):
+            if days is None:
+                yield from self._stream_rows(from_date, to_date)
+                continue
+            with self.engine.connect() as connection:
+                cached = self._get_days(connection, days)
+                connection.commit()
+            for rows in cached:
+                yield from rows
 
-        return Report(
-            header=self._get_header(),
-            items=[
-                (
-                    items.get(row.item_id)[0],
-                    items.get(row.item_id)[1],
+    def _stream_rows(
+        self, from_date: datetime, to_date: datetime
+    ) -> typing.Iterator[tuple]:
+        with self.engine.connect() as connection:
+            connection.execution_options(
+                stream_results=True, yield_per=REPORT_STREAM_BATCH_SIZE
+            )
+            for row in GET_REPORT_ROWS.execute(
+                connection, {"from_date": from_date, "to_date": to_date}
+            ):
+                updated_at = row.updated_at.astimezone(MOSCOW_TIMEZONE).strftime(
+                    REPORT_TIME_FORMAT
+                )
+                yield (
+                    row.manufacturer,
+                    row.model,
                     row.count,
-                    warehouses.get(row.warehouse_id),
-                    row.deposited_at.astimezone(MOSCOW_TIMEZONE).strftime(
-                        "%H:%M %d %m %Y"
-                    )
-                    if row.deposited_at
-                    else None,
-                    row.deducted_at.astimezone(MOSCOW_TIMEZONE).strftime(
-                        "%H:%M %d %m %Y"
-                    )
-                    if row.deducted_at
-                    else None,
+                    row.warehouse_name,
+                    updated_at if row.is_deposit else None,
+                    None if row.is_deposit else updated_at,
                 )
-                for row in rows
-            ],
-        )
+            connection.commit()
 
 
 report_generator = ReportGenerator(db_connector.engine)
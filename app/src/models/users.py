@@ -4,11 +4,52 @@ import typing
 
 from pydantic import BaseModel
 
-from sqlalchemy import exc, text
+from sqlalchemy import exc
 
-from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+from ..constants import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
 from ..models import helpers
 from ..models import warehouse
+from ..models.queries import query_registry
+from ..utils.cache import TTLCache
+
+GET_SIMPLE_USER = query_registry.declare("users/get_simple_user.sql", "username")
+GET_USER = query_registry.declare("users/get_user.sql", "username")
+GET_USER_BY_ID = query_registry.declare("users/get_user_by_id.sql", "user_id")
+GET_USERS_BY_IDS = query_registry.declare("users/get_users_by_ids.sql", "user_ids")
+GET_USERS = query_registry.declare("users/get_users.sql")
+CREATE_USER = query_registry.declare(
+    "users/create_user.sql",
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "password_hash",
+    "phone_number",
+    "created_at",
+    "updated_at",
+    "warehouses",
+    "is_admin",
+    "is_reviewer",
+    "is_superuser",
+)
+DELETE_USER = query_registry.declare("users/delete_user.sql", "username")
+UPDATE_USER = query_registry.declare(
+    "users/update_user.sql",
+    "username",
+    "first_name",
+    "last_name",
+    "phone_number",
+    "warehouses",
+    "is_admin",
+    "is_reviewer",
+    "is_superuser",
+    "password_hash",
+)
+UPDATE_PASSWORD_HASH = query_registry.declare(
+    "users/update_password_hash.sql", "username", "password_hash", "old_password_hash"
+)
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS, name="users")
 
 
 class Token(BaseModel):
@@ -115,15 +156,8 @@ class ListApiUsers(BaseModel):
 def get_simple_user(engine, username: str) -> typing.Optional[SimpleUser]:
     result: typing.Optional[SimpleUser] = None
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/get_simple_user.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = {"username": username}
-            for row in connection.execute(query, args):
-                result = SimpleUser(
-                    username=row.username, password_hash=row.password_hash
-                )
+        for row in GET_SIMPLE_USER.execute(connection, {"username": username}):
+            result = SimpleUser(username=row.username, password_hash=row.password_hash)
         connection.commit()
     return result
 
@@ -131,36 +165,44 @@ def get_simple_user(engine, username: str) -> typing.Optional[SimpleUser]:
 def get_user(engine, username: str) -> typing.Optional[InternalUser]:
     result: typing.Optional[InternalUser] = None
     with engine.connect() as connection:
-        with open(f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/get_user.sql") as sql:
-            query = text(sql.read())
-            args = {"username": username}
-            for row in connection.execute(query, args):
-                result = InternalUser(**row._mapping)
+        for row in GET_USER.execute(connection, {"username": username}):
+            result = InternalUser(**row._mapping)
         connection.commit()
     return result
 
 
+def get_cached_user(engine, username: str) -> typing.Optional[InternalUser]:
+    user = user_cache.get(username)
+    if user is None:
+        user = get_user(engine, username)
+        if user is not None:
+            user_cache.put(username, user)
+    return user
+
+
 def get_user_by_id_transaction(
     connection, user_id: str
 ) -> typing.Optional[InternalUser]:
     result: typing.Optional[InternalUser] = None
-    with open(
-        f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/get_user_by_id.sql"
-    ) as sql:
-        query = text(sql.read())
-        args = {"user_id": user_id}
-        for row in connection.execute(query, args):
-            result = InternalUser(**row._mapping)
+    for row in GET_USER_BY_ID.execute(connection, {"user_id": user_id}):
+        result = InternalUser(**row._mapping)
+    return result
+
+
+def get_users_by_ids_transaction(
+    connection, user_ids: typing.Iterable[str]
+) -> typing.Dict[str, InternalUser]:
+    result: typing.Dict[str, InternalUser] = {}
+    for row in GET_USERS_BY_IDS.execute(connection, {"user_ids": list(user_ids)}):
+        result[row.id] = InternalUser(**row._mapping)
     return result
 
 
 def get_users(engine) -> typing.List[InternalUser]:
     result: typing.List[InternalUser] = []
     with engine.connect() as connection:
-        with open(f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/get_users.sql") as sql:
-            query = text(sql.read())
-            for row in connection.execute(query):
-                result.append(InternalUser(**row._mapping))
+        for row in GET_USERS.execute(connection):
+            result.append(InternalUser(**row._mapping))
         connection.commit()
     return result
 
@@ -169,33 +211,26 @@ def create_user(
     engine, idempotency_token: str, user: CreateApiUser, hash_f
 ) -> InternalUser:
     with engine.connect() as connection:
-        warehouses: typing.List[warehouse.Warehouse] = []
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/get_warehouse_list.sql"
-        ) as sql:
-            query = text(sql.read())
-            for row in connection.execute(query):
-                warehouses.append(row.id)
+        warehouses: typing.List[str] = []
+        for row in warehouse.GET_WAREHOUSE_LIST.execute(connection):
+            warehouses.append(row.id)
 
         if not all(w in warehouses for w in user.warehouses):
             raise helpers.get_bad_request(
                 "Пожалуйста проверьте список складов пользователя, кажется он неверен"
             )
 
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/create_user.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = user.get_internal_user(idempotency_token, hash_f).model_dump()
-            try:
-                result = connection.execute(query, args).all()
-            except exc.IntegrityError as _:
-                raise helpers.get_bad_request(
-                    "Пользователь с таким именем пользователя уже существует"
-                )
-            if not result:
-                raise RuntimeError("Failed to update user data")
+        args = user.get_internal_user(idempotency_token, hash_f).model_dump()
+        try:
+            result = CREATE_USER.execute(connection, args).all()
+        except exc.IntegrityError as _:
+            raise helpers.get_bad_request(
+                "Пользователь с таким именем пользователя уже существует"
+            )
+        if not result:
+            raise RuntimeError("Failed to update user data")
         connection.commit()
+    user_cache.invalidate(user.username)
     logging.info("Created user successfully")
     return InternalUser(**result[0]._mapping)
 
@@ -203,23 +238,17 @@ def create_user(
 def delete_user(engine, username: str):
     with engine.connect() as connection:
         user = None
-        with open(f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/get_user.sql") as sql:
-            query = text(sql.read())
-            args = {"username": username}
-            for row in connection.execute(query, args):
-                user = InternalUser(**row._mapping)
+        for row in GET_USER.execute(connection, {"username": username}):
+            user = InternalUser(**row._mapping)
 
         if not user:
             return
         if user.is_superuser:
             raise helpers.get_bad_request("Невозможно удалить суперюзера")
 
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/delete_user.sql"
-        ) as sql:
-            query = text(sql.read())
-            connection.execute(query, {"username": username})
+        DELETE_USER.execute(connection, {"username": username})
         connection.commit()
+    user_cache.invalidate(username)
     logging.info("Deleted user successfully")
 
 
@@ -227,14 +256,28 @@ def update_user(
     engine, new_data: UpdateApiUser, hash_f
 ) -> typing.Optional[InternalUser]:
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/users/update_user.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = new_data.get_update_user(hash_f).model_dump()
-            result = connection.execute(query, args).all()
-            if not result:
-                return None
-            logging.info("Updated user successfully")
+        args = new_data.get_update_user(hash_f).model_dump()
+        result = UPDATE_USER.execute(connection, args).all()
+        if not result:
+            return None
+        logging.info("Updated user successfully")
+        connection.commit()
+    user_cache.invalidate(new_data.username)
+    return InternalUser(**result[0]._mapping)
+
+
+def update_password_hash(
+    engine, username: str, old_password_hash: str, password_hash: str
+):
+    with engine.connect() as connection:
+        UPDATE_PASSWORD_HASH.execute(
+            connection,
+            {
+                "username": username,
+                "password_hash": password_hash,
+                "old_password_hash": old_password_hash,
+            },
+        )
         connection.commit()
-        return InternalUser(**result[0]._mapping)
+    user_cache.invalidate(username)
+    logging.info("Rehashed user password")
@@ -4,9 +4,38 @@ import typing
 
 from pydantic import BaseModel
 
-from sqlalchemy import text
-
-from ..constants import BASE_POSTGRES_TRANSACTIONS_DIRECTORY
+from ..models.queries import query_registry
+from ..models.reports import report_generator
+
+CREATE_WAREHOUSE = query_registry.declare(
+    "warehouse/create_warehouse.sql",
+    "id",
+    "warehouse_name",
+    "address",
+    "created_at",
+    "updated_at",
+)
+GET_WAREHOUSE_LIST = query_registry.declare("warehouse/get_warehouse_list.sql")
+GET_WAREHOUSE_BY_ID = query_registry.declare("warehouse/get_warehouse_by_id.sql", "id")
+GET_SIMPLE_WAREHOUSE_BY_ID = query_registry.declare(
+    "warehouse/get_simple_warehouse_by_id.sql", "id"
+)
+GET_SIMPLE_WAREHOUSES_BY_IDS = query_registry.declare(
+    "warehouse/get_simple_warehouses_by_ids.sql", "ids"
+)
+UPDATE_WAREHOUSE = query_registry.declare(
+    "warehouse/update_warehouse.sql", "id", "warehouse_name", "address"
+)
+DELETE_WAREHOUSE = query_registry.declare("warehouse/delete_warehouse.sql", "id")
+GET_STOCK_VERSION = query_registry.declare(
+    "warehouse/get_stock_version.sql", "warehouse_id"
+)
+BUMP_STOCK_VERSIONS = query_registry.declare(
+    "warehouse/bump_stock_versions.sql", "warehouse_ids"
+)
+BUMP_STOCK_VERSIONS_BY_ITEM = query_registry.declare(
+    "warehouse/bump_stock_versions_by_item.sql", "item_id"
+)
 
 
 class Warehouse(BaseModel):
@@ -45,15 +74,11 @@ def create_warehouse(
     engine, idempotency_token, warehouse: SimpleWarehouse
 ) -> Warehouse:
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/create_warehouse.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = warehouse.get_warehouse_model(idempotency_token).model_dump()
-            result = connection.execute(query, args).all()
-            if not result:
-                raise RuntimeError("Failed to create warehouse")
-            logging.info("Successfully created warehouse")
+        args = warehouse.get_warehouse_model(idempotency_token).model_dump()
+        result = CREATE_WAREHOUSE.execute(connection, args).all()
+        if not result:
+            raise RuntimeError("Failed to create warehouse")
+        logging.info("Successfully created warehouse")
         connection.commit()
     return Warehouse(**result[0]._mapping)
 
@@ -61,24 +86,16 @@ def create_warehouse(
 def get_warehouse_list(engine) -> typing.List[Warehouse]:
     result: typing.List[Warehouse] = []
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/get_warehouse_list.sql"
-        ) as sql:
-            query = text(sql.read())
-            for row in connection.execute(query):
-                result.append(Warehouse(**row._mapping))
+        for row in GET_WAREHOUSE_LIST.execute(connection):
+            result.append(Warehouse(**row._mapping))
     return result
 
 
 def get_warehouse_by_id(engine, id: str) -> typing.Optional[Warehouse]:
     result: typing.Optional[Warehouse] = None
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/get_warehouse_by_id.sql"
-        ) as sql:
-            query = text(sql.read())
-            for row in connection.execute(query, {"id": id}):
-                result = Warehouse(**row._mapping)
+        for row in GET_WAREHOUSE_BY_ID.execute(connection, {"id": id}):
+            result = Warehouse(**row._mapping)
         connection.commit()
     return result
 
@@ -87,12 +104,19 @@ def get_simple_warehouse_by_id_transaction(
     connection, id: str
 ) -> typing.Optional[SimpleWarehouse]:
     result: typing.Optional[Warehouse] = None
-    with open(
-        f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/get_simple_warehouse_by_id.sql"
-    ) as sql:
-        query = text(sql.read())
-        for row in connection.execute(query, {"id": id}):
-            result = SimpleWarehouse(**row._mapping)
+    for row in GET_SIMPLE_WAREHOUSE_BY_ID.execute(connection, {"id": id}):
+        result = SimpleWarehouse(**row._mapping)
+    return result
+
+
+def get_simple_warehouses_by_ids_transaction(
+    connection, ids: typing.Iterable[str]
+) -> typing.Dict[str, SimpleWarehouse]:
+    result: typing.Dict[str, SimpleWarehouse] = {}
+    for row in GET_SIMPLE_WAREHOUSES_BY_IDS.execute(connection, {"ids": list(ids)}):
+        result[row.id] = SimpleWarehouse(
+            warehouse_name=row.warehouse_name, address=row.address
+        )
     return result
 
 
@@ -100,25 +124,41 @@ def update_warehouse(
     engine, warehouse_update: WarehouseUpdate
 ) -> typing.Optional[Warehouse]:
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/update_warehouse.sql"
-        ) as sql:
-            query = text(sql.read())
-            args = warehouse_update.model_dump()
-            result = connection.execute(query, args).all()
-            if not result:
-                return None
+        args = warehouse_update.model_dump()
+        result = UPDATE_WAREHOUSE.execute(connection, args).all()
+        if not result:
+            return None
         connection.commit()
+        report_generator.invalidate_all()
         logging.info("Successfully updated warehouse")
         return Warehouse(**result[0]._mapping)
 
 
 def delete_warehouse(engine, id: str) -> None:
     with engine.connect() as connection:
-        with open(
-            f"{BASE_POSTGRES_TRANSACTIONS_DIRECTORY}/warehouse/delete_warehouse.sql"
-        ) as sql:
-            query = text(sql.read())
-            connection.execute(query, {"id": id})
-            connection.commit()
-            logging.info("Successfully deleted warehouse")
+        DELETE_WAREHOUSE.execute(connection, {"id": id})
+        connection.commit()
+        logging.info("Successfully deleted warehouse")
+
+
+def get_stock_version(engine, warehouse_id: str) -> int:
+    """
+    Version of the stock list of a warehouse. It changes whenever counts on
+    the warehouse or cards of items on it change, 0 means never changed.
+    """
+    with engine.connect() as connection:
+        version = GET_STOCK_VERSION.execute(
+            connection, {"warehouse_id": warehouse_id}
+        ).scalar()
+        connection.commit()
+    return version or 0
+
+
+def bump_stock_versions_transaction(connection, warehouse_ids: typing.Iterable[str]):
+    warehouse_ids = list(warehouse_ids)
+    if warehouse_ids:
+        BUMP_STOCK_VERSIONS.execute(connection, {"warehouse_ids": warehouse_ids})
+
+
+def bump_stock_versions_by_item_transaction(connection, item_id: str):
+    BUMP_STOCK_VERSIONS_BY_ITEM.execute(connection, {"item_id": item_id})
@@ -0,0 +1,49 @@
+import typing
+
+from fastapi import APIRouter, Depends
+
+from ..models import alerts
+from ..models import helpers
+from ..models import users
+from ..models.connector import db_connector
+from ..utils import crypto
+
+alerts_router = APIRouter(tags=["alerts"])
+
+
+@alerts_router.get(
+    "/alerts/thresholds",
+    response_model=alerts.ListStockThresholds,
+    responses=helpers.UNATHORIZED_RESPONSE,
+)
+def get_stock_thresholds(
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
+    warehouse_id: typing.Optional[str] = None,
+):
+    return alerts.get_stock_thresholds(db_connector.engine, warehouse_id)
+
+
+@alerts_router.put(
+    "/alerts/thresholds",
+    response_model=alerts.StockThreshold,
+    responses=helpers.BAD_REQUEST_RESPONSE,
+)
+def set_stock_threshold(
+    threshold: alerts.StockThreshold,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+):
+    return alerts.set_stock_threshold(db_connector.engine, threshold)
+
+
+@alerts_router.delete(
+    "/alerts/thresholds",
+    response_model=helpers.EmptyResponse,
+    responses=helpers.NOT_FOUND_RESPONSE,
+)
+def delete_stock_threshold(
+    warehouse_id: str,
+    item_id: str,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+):
+    alerts.delete_stock_threshold(db_connector.engine, warehouse_id, item_id)
+    return helpers.EmptyResponse()
@@ -1,4 +1,3 @@
-from datetime import datetime
 import logging
 import typing
 
@@ -10,6 +9,7 @@ from ..models import users
 from ..models.connector import db_connector
 from ..utils import converters
 from ..utils import crypto
+from ..utils.serialization import ModelResponse
 
 applications_router = APIRouter(tags=["applications"])
 
@@ -19,7 +19,7 @@ applications_router = APIRouter(tags=["applications"])
     response_model=applications.Application,
     responses=helpers.BAD_REQUEST_RESPONSE,
 )
-async def create_application(
+def create_application(
     x_request_idempotency_token: typing.Annotated[str, Header()],
     new_application: applications.ChangeApplicationRequest,
     user: typing.Annotated[
@@ -37,7 +37,7 @@ async def create_application(
     response_model=applications.ApplicationWithActions,
     responses=helpers.NOT_FOUND_RESPONSE,
 )
-async def get_application(
+def get_application(
     id: str,
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_user_with_token)
@@ -74,7 +74,7 @@ async def get_application(
     response_model=applications.Application,
     responses={**helpers.BAD_REQUEST_RESPONSE, **helpers.NOT_FOUND_RESPONSE},
 )
-async def patch_application(
+def patch_application(
     id: str,
     new_application: applications.ChangeApplicationRequest,
     user: typing.Annotated[
@@ -93,7 +93,7 @@ async def patch_application(
     response_model=helpers.EmptyResponse,
     responses={**helpers.BAD_REQUEST_RESPONSE, **helpers.NOT_FOUND_RESPONSE},
 )
-async def delete_application(
+def delete_application(
     id: str,
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_user_with_token)
@@ -108,7 +108,7 @@ async def delete_application(
     response_model=helpers.EmptyResponse,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def approve_application(
+def approve_application(
     id: str,
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_admin_with_token)
@@ -123,7 +123,7 @@ async def approve_application(
     response_model=helpers.EmptyResponse,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def reject_application(
+def reject_application(
     id: str,
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_admin_with_token)
@@ -133,23 +133,36 @@ async def reject_application(
     return helpers.EmptyResponse()
 
 
+@applications_router.put(
+    "/applications/review",
+    response_model=applications.BulkReviewResponse,
+    responses=helpers.BAD_REQUEST_RESPONSE,
+)
+def review_applications(
+    request: applications.BulkReviewRequest,
+    user: typing.Annotated[
+        users.InternalUser, Depends(crypto.authorize_admin_with_token)
+    ],
+):
+    return applications.review_applications(db_connector.engine, request, user.id)
+
+
 @applications_router.get(
     "/applications/list",
     response_model=applications.ApplicationsList,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def get_applications_list(
+def get_applications_list(
     limit: int,
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_user_with_token)
     ],
     status_filter: typing.Optional[applications.ApplicationStatus] = None,
-    cursor: typing.Optional[datetime] = None,
+    cursor: typing.Optional[str] = None,
 ):
-    if user.is_superuser or user.is_admin:
-        return applications.get_applications_list(
-            db_connector.engine, None, cursor, limit, status_filter
+    chained_to_user_id = None if user.is_superuser or user.is_admin else user.id
+    return ModelResponse(
+        applications.get_applications_list(
+            db_connector.engine, chained_to_user_id, cursor, limit, status_filter
         )
-    return applications.get_applications_list(
-        db_connector.engine, user.id, cursor, limit, status_filter
     )
@@ -1,13 +1,16 @@
 import logging
 import typing
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Query, Response, UploadFile
 
+from ..constants import ITEM_SEARCH_MAX_LIMIT, ITEM_SEARCH_MIN_QUERY_LENGTH
 from ..models import helpers
 from ..models import items
 from ..models import users
+from ..models import warehouse
 from ..models.connector import db_connector
 from ..utils import crypto
+from ..utils.serialization import ModelResponse
 
 items_router = APIRouter(tags=["items"])
 
@@ -15,7 +18,7 @@ items_router = APIRouter(tags=["items"])
 @items_router.post(
     "/items", response_model=items.Item, responses=helpers.UNATHORIZED_RESPONSE
 )
-async def create_item(
+def create_item(
     new_item: items.CreateItem,
     x_request_idempotency_token: typing.Annotated[str, Header()],
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
@@ -23,12 +26,25 @@ async def create_item(
     return items.create_item(db_connector.engine, x_request_idempotency_token, new_item)
 
 
+@items_router.post(
+    "/items/import",
+    response_model=items.ItemImportResult,
+    responses=helpers.UNATHORIZED_RESPONSE,
+)
+def import_items(
+    file: UploadFile,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+    file_format: items.ItemImportFormat = items.ItemImportFormat.CSV,
+):
+    return items.import_items(db_connector.engine, file.file, file_format)
+
+
 @items_router.get(
     "/items",
     response_model=items.ItemWithWarehouseCount,
     responses=helpers.NOT_FOUND_RESPONSE,
 )
-async def get_item(
+def get_item(
     item_id: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
 ):
@@ -43,7 +59,7 @@ async def get_item(
     response_model=items.Item,
     responses=helpers.NOT_FOUND_RESPONSE,
 )
-async def update_item(
+def update_item(
     new_item_data: items.UpdateItem,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
 ):
@@ -58,7 +74,7 @@ async def update_item(
     response_model=helpers.EmptyResponse,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def delete_item(
+def delete_item(
     item_id: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
 ):
@@ -71,19 +87,76 @@ async def delete_item(
     response_model=items.ListItems,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def get_items_list(
+def get_items_list(
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)]
 ):
-    return items.get_items_list(db_connector.engine)
+    return ModelResponse(items.get_items_list(db_connector.engine))
 
 
 @items_router.get(
-    "/items/by-warehouse",
-    response_model=items.ListItemsWithCount,
+    "/items/by-code",
+    response_model=items.ListItems,
+    responses=helpers.NOT_FOUND_RESPONSE,
+)
+def get_items_by_code(
+    code: str,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
+):
+    found = items.get_items_by_codes(db_connector.engine, [code]).items[code]
+    if not found:
+        raise helpers.NOT_FOUND_ERROR
+    return items.ListItems(items=found)
+
+
+@items_router.post(
+    "/items/by-codes",
+    response_model=items.ItemsByCodes,
+    responses=helpers.UNATHORIZED_RESPONSE,
+)
+def get_items_by_codes(
+    request: items.ItemCodesRequest,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
+):
+    return items.get_items_by_codes(db_connector.engine, request.codes)
+
+
+@items_router.get(
+    "/items/search",
+    response_model=items.ItemsSearchResult,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def get_items_list_by_warehouse(
+def search_items(
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
+    query: typing.Annotated[
+        typing.Optional[str], Query(min_length=ITEM_SEARCH_MIN_QUERY_LENGTH)
+    ] = None,
+    code: typing.Optional[str] = None,
+    cursor: typing.Optional[str] = None,
+    limit: typing.Annotated[int, Query(gt=0, le=ITEM_SEARCH_MAX_LIMIT)] = 50,
+):
+    return ModelResponse(
+        items.search_items(db_connector.engine, query, code, cursor, limit)
+    )
+
+
+@items_router.get(
+    "/items/by-warehouse",
+    response_model=items.ListItemsWithStock,
+    responses={**helpers.UNATHORIZED_RESPONSE, 304: {"description": "Not modified"}},
+)
+def get_items_list_by_warehouse(
     warehouse_id: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
+    if_none_match: typing.Annotated[typing.Optional[str], Header()] = None,
 ):
-    return items.get_items_by_warehouse(db_connector.engine, warehouse_id)
+    version = warehouse.get_stock_version(db_connector.engine, warehouse_id)
+    headers = {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+    if helpers.etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=items.get_items_by_warehouse_json(
+            db_connector.engine, warehouse_id, version
+        ),
+        media_type="application/json",
+        headers=headers,
+    )
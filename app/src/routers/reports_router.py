@@ -1,18 +1,23 @@
 import logging
 import typing
 
-from io import BytesIO
-
-import pandas as pd
-
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends
+from fastapi.responses import FileResponse, StreamingResponse
 
 from ..models import helpers
 from ..models import users
+from ..models import report_jobs
 from ..models import reports
 from ..utils import crypto
+from ..utils import report_files
+from ..utils.serialization import ModelResponse
 
 EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CONTENT_TYPE = "text/csv"
+CONTENT_TYPES = {
+    reports.ReportFileFormat.XLSX: EXCEL_CONTENT_TYPE,
+    reports.ReportFileFormat.CSV: CSV_CONTENT_TYPE,
+}
 
 reports_router = APIRouter(tags=["reports"])
 
@@ -20,30 +25,89 @@ reports_router = APIRouter(tags=["reports"])
 @reports_router.post(
     "/reports/file",
     responses={
-        200: {"content": {EXCEL_CONTENT_TYPE: {}}},
+        200: {"content": {EXCEL_CONTENT_TYPE: {}, CSV_CONTENT_TYPE: {}}},
+        **helpers.BAD_REQUEST_RESPONSE,
         **helpers.UNATHORIZED_RESPONSE,
     },
 )
-async def get_reports_file(
+def get_reports_file(
     request: reports.ReportRequest,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+    file_format: reports.ReportFileFormat = reports.ReportFileFormat.XLSX,
 ):
-    report = reports.report_generator.prepare_report(request.interval)
-    df = pd.DataFrame(report.items, columns=report.header)
-    output = BytesIO()
-    df.to_excel(output, index=False, engine="openpyxl")
-    output.seek(0)
-    return Response(
-        content=output.getvalue(),
+    header = reports.report_generator.get_header(request.group_by)
+    rows = reports.report_generator.iter_report_rows(request.interval, request.group_by)
+    if file_format == reports.ReportFileFormat.CSV:
+        return StreamingResponse(
+            report_files.iter_csv(header, rows),
+            media_type=CSV_CONTENT_TYPE,
+            headers={"Content-Disposition": 'attachment; filename="report.csv"'},
+        )
+    return StreamingResponse(
+        report_files.iter_xlsx(header, rows),
         media_type=EXCEL_CONTENT_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="report.xlsx"'},
     )
 
 
 @reports_router.post(
-    "/reports", response_model=reports.Report, responses=helpers.UNATHORIZED_RESPONSE
+    "/reports",
+    response_model=reports.Report,
+    responses={**helpers.BAD_REQUEST_RESPONSE, **helpers.UNATHORIZED_RESPONSE},
 )
-async def get_reports_by_interval(
+def get_reports_by_interval(
     request: reports.ReportRequest,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
 ):
-    return reports.report_generator.prepare_report(request.interval)
+    return ModelResponse(
+        reports.report_generator.prepare_report(request.interval, request.group_by)
+    )
+
+
+@reports_router.post(
+    "/reports/jobs",
+    response_model=report_jobs.ReportJob,
+    responses=helpers.BAD_REQUEST_RESPONSE,
+)
+def submit_report_job(
+    request: report_jobs.ReportJobRequest,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+):
+    return report_jobs.report_jobs.submit(request)
+
+
+@reports_router.get(
+    "/reports/jobs",
+    response_model=report_jobs.ReportJob,
+    responses=helpers.NOT_FOUND_RESPONSE,
+)
+def get_report_job(
+    id: str,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+):
+    job = report_jobs.report_jobs.get(id)
+    if not job:
+        raise helpers.NOT_FOUND_ERROR
+    return job
+
+
+@reports_router.get(
+    "/reports/jobs/file",
+    responses={
+        200: {"content": {EXCEL_CONTENT_TYPE: {}, CSV_CONTENT_TYPE: {}}},
+        **helpers.BAD_REQUEST_RESPONSE,
+        **helpers.NOT_FOUND_RESPONSE,
+    },
+)
+def get_report_job_file(
+    id: str,
+    _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
+):
+    job = report_jobs.report_jobs.get(id)
+    if not job:
+        raise helpers.NOT_FOUND_ERROR
+    return FileResponse(
+        report_jobs.report_jobs.get_file_path(id),
+        media_type=CONTENT_TYPES[job.file_format],
+        filename=f"report.{job.file_format.value}",
+    )
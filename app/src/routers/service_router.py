@@ -0,0 +1,30 @@
+import typing
+
+from fastapi import APIRouter, Depends, Response
+
+from ..models import helpers
+from ..models import users
+from ..models.connector import PoolStats, db_connector
+from ..utils import crypto
+from ..utils.metrics import CONTENT_TYPE, metrics_registry
+
+service_router = APIRouter(tags=["service"])
+
+
+@service_router.get(
+    "/service/pool",
+    response_model=PoolStats,
+    responses=helpers.UNATHORIZED_RESPONSE,
+)
+def get_pool_stats(
+    _: typing.Annotated[
+        users.InternalUser, Depends(crypto.authorize_super_user_with_token)
+    ],
+):
+    return db_connector.get_pool_stats()
+
+
+# Left without auth for the scraper, nginx keeps it off the public listener.
+@service_router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
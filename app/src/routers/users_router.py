@@ -16,7 +16,7 @@ users_router = APIRouter(tags=["users"])
 @users_router.post(
     "/token", response_model=users.Token, responses=helpers.UNATHORIZED_RESPONSE
 )
-async def authorize(form_data: typing.Annotated[OAuth2PasswordRequestForm, Depends()]):
+def authorize(form_data: typing.Annotated[OAuth2PasswordRequestForm, Depends()]):
     user = crypto.authorize_user(
         db_connector.engine, form_data.username, form_data.password
     )
@@ -32,7 +32,7 @@ async def authorize(form_data: typing.Annotated[OAuth2PasswordRequestForm, Depen
     response_model=users.ApiUser,
     responses=helpers.BAD_REQUEST_RESPONSE,
 )
-async def create_user(
+def create_user(
     new_user: users.CreateApiUser,
     x_request_idempotency_token: typing.Annotated[str, Header()],
     _: typing.Annotated[
@@ -54,7 +54,7 @@ async def create_user(
     response_model=users.ListApiUsers,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def get_users(
+def get_users(
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)]
 ):
     db_users = users.get_users(db_connector.engine)
@@ -64,7 +64,7 @@ async def get_users(
 @users_router.get(
     "/users", response_model=users.ApiUser, responses=helpers.NOT_FOUND_RESPONSE
 )
-async def get_user(
+def get_user(
     username: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
 ):
@@ -79,7 +79,7 @@ async def get_user(
     response_model=helpers.EmptyResponse,
     responses=helpers.BAD_REQUEST_RESPONSE,
 )
-async def delete_user(
+def delete_user(
     username: str,
     _: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_super_user_with_token)
@@ -92,7 +92,7 @@ async def delete_user(
 @users_router.put(
     "/users", response_model=users.ApiUser, responses=helpers.NOT_FOUND_RESPONSE
 )
-async def update_user(
+def update_user(
     update_user_data: users.UpdateApiUser,
     _: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_super_user_with_token)
@@ -16,7 +16,7 @@ warehouse_router = APIRouter(tags=["warehouse"])
     response_model=warehouse.Warehouse,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def create_warehouse(
+def create_warehouse(
     api_warehouse: warehouse.SimpleWarehouse,
     x_request_idempotency_token: typing.Annotated[str, Header()],
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
@@ -33,7 +33,7 @@ async def create_warehouse(
     response_model=warehouse.Warehouse,
     responses=helpers.NOT_FOUND_RESPONSE,
 )
-async def get_warehouse_by_id(
+def get_warehouse_by_id(
     warehouse_id: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_user_with_token)],
 ):
@@ -50,7 +50,7 @@ async def get_warehouse_by_id(
     response_model=warehouse.ApiWarehouseList,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def get_warehouse_list(
+def get_warehouse_list(
     user: typing.Annotated[
         users.InternalUser, Depends(crypto.authorize_user_with_token)
     ]
@@ -65,7 +65,7 @@ async def get_warehouse_list(
     response_model=warehouse.Warehouse,
     responses=helpers.NOT_FOUND_RESPONSE,
 )
-async def update_warehouse(
+def update_warehouse(
     warehouse_update: warehouse.WarehouseUpdate,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
 ):
@@ -82,7 +82,7 @@ async def update_warehouse(
     response_model=helpers.EmptyResponse,
     responses=helpers.UNATHORIZED_RESPONSE,
 )
-async def delete_warehouse(
+def delete_warehouse(
     warehouse_id: str,
     _: typing.Annotated[users.InternalUser, Depends(crypto.authorize_admin_with_token)],
 ):
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+import threading
+import time
+import typing
+
+from .metrics import CallbackMetric
+
+# Caches by name, reported on /metrics.
+_named_caches: typing.Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Thread safe LRU cache with a bounded size where entries expire `ttl`
+    seconds after they were put, unless `put` is given its own ttl.
+    Caches with a name export their hits, misses and size as metrics.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: typing.Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[typing.Hashable, typing.Tuple[float, typing.Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        if name is not None:
+            _named_caches[name] = self
+
+    def get(self, key: typing.Hashable) -> typing.Optional[typing.Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(
+        self,
+        key: typing.Hashable,
+        value: typing.Any,
+        ttl: typing.Optional[float] = None,
+    ):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: typing.Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+CallbackMetric(
+    "cache_hits_total",
+    "Lookups served from an in-process cache",
+    lambda: {(name,): cache.hits for name, cache in _named_caches.items()},
+    type="counter",
+    labelnames=("cache",),
+)
+CallbackMetric(
+    "cache_misses_total",
+    "Lookups that missed an in-process cache",
+    lambda: {(name,): cache.misses for name, cache in _named_caches.items()},
+    type="counter",
+    labelnames=("cache",),
+)
+CallbackMetric(
+    "cache_entries",
+    "Entries held by an in-process cache",
+    lambda: {(name,): len(cache) for name, cache in _named_caches.items()},
+    labelnames=("cache",),
+)
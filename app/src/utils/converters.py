@@ -1,18 +1,22 @@
 import typing
 
 from ..models import users
+from .serialization import trusted
 
 
 def convert_user(user: users.InternalUser) -> users.ApiUser:
-    return users.ApiUser(
-        username=user.username,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        phone_number=user.phone_number,
-        warehouses=user.warehouses,
-        is_admin=user.is_admin,
-        is_reviewer=user.is_reviewer,
-        is_superuser=user.is_superuser,
+    return trusted(
+        users.ApiUser,
+        {
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "phone_number": user.phone_number,
+            "warehouses": user.warehouses,
+            "is_admin": user.is_admin,
+            "is_reviewer": user.is_reviewer,
+            "is_superuser": user.is_superuser,
+        },
     )
 
 
@@ -1,26 +1,39 @@
 from datetime import datetime, timedelta
+import hashlib
 import logging
 import os
+import time
 import typing
 
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 
-from ..constants import JWT_ALGORITHM, JWT_EXPIRE_MINUTES
+from ..constants import JWT_ALGORITHM, JWT_EXPIRE_MINUTES, TOKEN_CACHE_SIZE
 from ..models import users
 from ..models.connector import db_connector
 from ..models.helpers import NO_PERMISSIONS_ERROR, UNATHORIZED_ERROR
-
-pwd_context = CryptContext(schemes=["sha256_crypt"])
+from ..utils import passwords
+from ..utils.cache import TTLCache
+from ..utils.metrics import Histogram
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Token digest -> verified claims, kept until the token expires.
+token_cache = TTLCache(
+    maxsize=TOKEN_CACHE_SIZE, ttl=JWT_EXPIRE_MINUTES * 60, name="tokens"
+)
+
+auth_latency = Histogram(
+    "auth_latency_seconds",
+    "Time spent authorizing a request by its token",
+    labelnames=("token_cache",),
+)
+
 
 def hash(data: str):
-    return pwd_context.hash(data)
+    return passwords.hash(data)
 
 
 def create_access_token(username: str):
@@ -34,7 +47,8 @@ def create_access_token(username: str):
 
 
 def verify_password(password: str, password_hash: str):
-    return pwd_context.verify(password, password_hash)
+    verified, _ = passwords.verify_and_update(password, password_hash)
+    return verified
 
 
 def authorize_user(
@@ -44,28 +58,51 @@ def authorize_user(
     if not user:
         logging.info("Could not fing user in DB")
         return False
-    if not verify_password(password, user.password_hash):
+    verified, new_password_hash = passwords.verify_and_update(
+        password, user.password_hash
+    )
+    if not verified:
         logging.info("Failed to verify user's password")
         return False
+    if new_password_hash:
+        users.update_password_hash(
+            connection, username, user.password_hash, new_password_hash
+        )
     return user
 
 
-def authorize_user_with_token(
-    token: typing.Annotated[str, Depends(oauth2_scheme)]
-) -> users.InternalUser:
+def _decode_token(token: str, token_key: bytes) -> typing.Mapping[str, typing.Any]:
     try:
         payload = jwt.decode(
             token, os.environ.get("JWT_SECRET_KEY"), algorithms=[JWT_ALGORITHM]
         )
+    except JWTError:
+        raise UNATHORIZED_ERROR
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        token_cache.put(token_key, payload, ttl=expires_in)
+    return payload
+
+
+def authorize_user_with_token(
+    token: typing.Annotated[str, Depends(oauth2_scheme)]
+) -> users.InternalUser:
+    started_at = time.perf_counter()
+    token_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(token_key)
+    cache_result = "hit" if payload is not None else "miss"
+    try:
+        if payload is None:
+            payload = _decode_token(token, token_key)
         username: str = payload.get("sub")
         if username is None:
             raise UNATHORIZED_ERROR
-    except JWTError:
-        raise UNATHORIZED_ERROR
-    user = users.get_user(db_connector.engine, username=username)
-    if user is None:
-        raise UNATHORIZED_ERROR
-    return user
+        user = users.get_cached_user(db_connector.engine, username=username)
+        if user is None:
+            raise UNATHORIZED_ERROR
+        return user
+    finally:
+        auth_latency.observe(time.perf_counter() - started_at, cache_result)
 
 
 def authorize_super_user_with_token(
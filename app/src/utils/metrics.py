@@ -0,0 +1,268 @@
+import abc
+import bisect
+import threading
+import time
+import typing
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+ROW_COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(
+    labelnames: typing.Sequence[str],
+    labels: typing.Sequence[str],
+    extra: typing.Optional[typing.Tuple[str, str]] = None,
+) -> str:
+    pairs = list(zip(labelnames, labels))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: typing.Dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric"):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+class Metric(abc.ABC):
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        registry: typing.Optional[MetricsRegistry] = metrics_registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    @abc.abstractmethod
+    def render(self) -> typing.List[str]:
+        """
+        Returns the sample lines of the metric in the text exposition format.
+        """
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: typing.Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> typing.Dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> typing.List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.collect().items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+class CallbackMetric(Metric):
+    """
+    Reads values owned by someone else (cache counters, pool state) only when
+    metrics are scraped. The callback returns a mapping of labels to values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: typing.Callable[[], typing.Mapping[tuple, float]],
+        type: str = "gauge",
+        labelnames: typing.Sequence[str] = (),
+        registry: typing.Optional[MetricsRegistry] = metrics_registry,
+    ):
+        self.type = type
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+
+    def render(self) -> typing.List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.callback().items()
+        ]
+
+
+class Histogram(Metric):
+    """
+    Cumulative histogram in the Prometheus sense. Observations only touch
+    one bucket counter under a lock, so it is cheap enough to stay on.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+        registry: typing.Optional[MetricsRegistry] = metrics_registry,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+        # labels -> [per bucket counts (last one is +Inf), sum, count]
+        self._series: typing.Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> typing.Dict[tuple, typing.Tuple[list, float, int]]:
+        with self._lock:
+            return {
+                labels: (list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            }
+
+    def render(self) -> typing.List[str]:
+        lines = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, (counts, total, count) in self.collect().items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_string = _format_labels(self.labelnames, labels, ("le", bound))
+                lines.append(f"{self.name}_bucket{label_string} {cumulative}")
+            label_string = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_string} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_string} {count}")
+        return lines
+
+
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request including sending its body",
+    labelnames=("method", "path", "status"),
+)
+http_request_errors = Counter(
+    "http_request_errors_total",
+    "Requests that failed with a server error",
+    labelnames=("method", "path"),
+)
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware, so streamed bodies are timed to their end and no
+    extra task is spawned per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                path,
+                str(status_code),
+            )
+            if status_code >= 500:
+                http_request_errors.inc(scope["method"], path)
@@ -0,0 +1,73 @@
+import abc
+import collections
+import json
+import logging
+import os
+import typing
+import urllib.request
+
+TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+TELEGRAM_TIMEOUT_SECONDS = 10
+# Telegram rejects longer messages.
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+LOG_NOTIFIER_HISTORY = 1000
+
+
+class Notifier(abc.ABC):
+    @abc.abstractmethod
+    def send(self, messages: typing.List[str]):
+        """
+        Delivers the messages, raising if they could not be sent.
+        """
+
+
+class LogNotifier(Notifier):
+    """
+    Writes notifications to the log and keeps the latest ones in `sent`,
+    for local runs and tests without a messenger.
+    """
+
+    def __init__(self):
+        self.sent: typing.Deque[str] = collections.deque(maxlen=LOG_NOTIFIER_HISTORY)
+
+    def send(self, messages: typing.List[str]):
+        for message in messages:
+            logging.warning(f"Notification: {message}")
+            self.sent.append(message)
+
+
+class TelegramNotifier(Notifier):
+    def __init__(self, token: str, chat_id: str):
+        self.url = TELEGRAM_API_URL.format(token=token)
+        self.chat_id = chat_id
+
+    def send(self, messages: typing.List[str]):
+        chunk = ""
+        for message in messages:
+            if chunk and len(chunk) + len(message) + 1 > TELEGRAM_MAX_MESSAGE_LENGTH:
+                self._send_message(chunk)
+                chunk = ""
+            chunk = f"{chunk}\n{message}" if chunk else message
+        if chunk:
+            self._send_message(chunk)
+
+    def _send_message(self, text: str):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"chat_id": self.chat_id, "text": text}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=TELEGRAM_TIMEOUT_SECONDS):
+            pass
+
+
+def get_notifier() -> Notifier:
+    """
+    Messages go to telegram when TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID are
+    set and to the log otherwise.
+    """
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
+    if token and chat_id:
+        return TelegramNotifier(token, chat_id)
+    return LogNotifier()
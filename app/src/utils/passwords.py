@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import typing
+
+from passlib.context import CryptContext
+
+DEFAULT_PASSWORD_HASH_SCHEME = "sha256_crypt"
+DEFAULT_PASSWORD_HASH_WORKERS = 2
+
+
+def _make_context() -> CryptContext:
+    """
+    Hashes are made with PASSWORD_HASH_SCHEME and PASSWORD_HASH_ROUNDS.
+    Hashes of any other scheme or with other rounds are reported by
+    `verify_and_update` so that they get rehashed on the next login.
+    """
+    scheme = os.environ.get("PASSWORD_HASH_SCHEME", DEFAULT_PASSWORD_HASH_SCHEME)
+    schemes = [scheme]
+    if scheme != DEFAULT_PASSWORD_HASH_SCHEME:
+        schemes.append(DEFAULT_PASSWORD_HASH_SCHEME)
+    settings = {}
+    rounds = os.environ.get("PASSWORD_HASH_ROUNDS")
+    if rounds:
+        for option in ("default_rounds", "min_rounds", "max_rounds"):
+            settings[f"{scheme}__{option}"] = int(rounds)
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+pwd_context = _make_context()
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(
+    password: str, password_hash: str
+) -> typing.Tuple[bool, typing.Optional[str]]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+# Hashing is CPU bound, so it runs in separate processes to keep a burst of
+# logins from starving request threads of the GIL. Spawned workers do not
+# inherit open database connections of the app.
+password_pool = ProcessPoolExecutor(
+    max_workers=int(
+        os.environ.get("PASSWORD_HASH_WORKERS", DEFAULT_PASSWORD_HASH_WORKERS)
+    ),
+    mp_context=multiprocessing.get_context("spawn"),
+)
+
+
+def hash(password: str) -> str:
+    return password_pool.submit(_hash, password).result()
+
+
+def verify_and_update(
+    password: str, password_hash: str
+) -> typing.Tuple[bool, typing.Optional[str]]:
+    return password_pool.submit(_verify_and_update, password, password_hash).result()
@@ -0,0 +1,42 @@
+import csv
+import io
+import tempfile
+import typing
+
+from openpyxl import Workbook
+
+FILE_CHUNK_SIZE = 64 * 1024
+CSV_FLUSH_ROWS = 1000
+
+
+def iter_csv(header: tuple, rows: typing.Iterable[tuple]) -> typing.Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % CSV_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def write_xlsx(header: tuple, rows: typing.Iterable[tuple], file: typing.BinaryIO):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(file)
+
+
+def iter_xlsx(header: tuple, rows: typing.Iterable[tuple]) -> typing.Iterator[bytes]:
+    # Write-only workbooks keep rows in a temporary file instead of memory, but
+    # the zip container can only be read back once the workbook is saved.
+    with tempfile.TemporaryFile() as file:
+        write_xlsx(header, rows, file)
+        file.seek(0)
+        while chunk := file.read(FILE_CHUNK_SIZE):
+            yield chunk
@@ -0,0 +1,53 @@
+import typing
+
+import numpy as np
+import pandas as pd
+import pytz
+
+MOSCOW_TIMEZONE = pytz.timezone("Europe/Moscow")
+REPORT_TIME_FORMAT = "%H:%M %d %m %Y"
+REPORT_DATE_FORMAT = "%d %m %Y"
+
+RAW_REPORT_COLUMNS = (
+    "manufacturer",
+    "model",
+    "count",
+    "warehouse_name",
+    "is_deposit",
+    "updated_at",
+)
+
+
+def build_raw_frame(rows: typing.Iterable[tuple]) -> pd.DataFrame:
+    return pd.DataFrame.from_records(rows, columns=RAW_REPORT_COLUMNS)
+
+
+def format_report_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts rows of reports/get_report_rows.sql into report columns with
+    timestamps localized for the whole column at once. Every payload line of
+    an application shares its timestamp, so each distinct one is formatted
+    only once.
+    """
+    codes, timestamps = pd.factorize(
+        pd.to_datetime(raw["updated_at"], utc=True)
+        .dt.tz_convert(MOSCOW_TIMEZONE)
+        .dt.tz_localize(None)
+    )
+    formatted = np.asarray(timestamps.strftime(REPORT_TIME_FORMAT), dtype=object)
+    updated_at = pd.Series(formatted[codes], index=raw.index, dtype=object)
+    is_deposit = raw["is_deposit"].astype(bool)
+    return pd.DataFrame(
+        {
+            "manufacturer": raw["manufacturer"],
+            "model": raw["model"],
+            "count": raw["count"],
+            "warehouse_name": raw["warehouse_name"],
+            "deposited_at": updated_at.where(is_deposit, None),
+            "deducted_at": updated_at.where(~is_deposit, None),
+        }
+    )
+
+
+def frame_to_rows(frame: pd.DataFrame) -> typing.List[tuple]:
+    return list(zip(*(frame[column].tolist() for column in frame.columns)))
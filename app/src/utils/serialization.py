@@ -0,0 +1,36 @@
+import typing
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+Model = typing.TypeVar("Model", bound=BaseModel)
+
+_set_attribute = object.__setattr__
+
+
+def trusted(model: typing.Type[Model], values: typing.Dict[str, typing.Any]) -> Model:
+    """
+    Builds a model from values that are already known to be valid, such as
+    rows read from the database, without running validation. Unlike
+    `model_construct` it does not look up defaults, so `values` must hold
+    every field of the model, with nested models already built.
+    """
+    instance = model.__new__(model)
+    _set_attribute(instance, "__dict__", values)
+    _set_attribute(instance, "__pydantic_fields_set__", set(values))
+    _set_attribute(instance, "__pydantic_extra__", None)
+    _set_attribute(instance, "__pydantic_private__", None)
+    return instance
+
+
+class ModelResponse(JSONResponse):
+    """
+    Renders a model with the serializer of pydantic-core. Returning it from
+    a handler skips the validation and `jsonable_encoder` pass FastAPI runs
+    for a `response_model`, which is still declared for the schema.
+    """
+
+    def render(self, content: typing.Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return type(content).__pydantic_serializer__.to_json(content)
+        return super().render(content)
@@ -0,0 +1,7 @@
+CREATE INDEX applications_created_at_id ON app.applications(created_at DESC, application_id DESC);
+
+CREATE INDEX applications_status_created_at_id ON app.applications(status, created_at DESC, application_id DESC);
+
+CREATE INDEX applications_created_by_created_at_id ON app.applications(created_by_id, created_at DESC, application_id DESC);
+
+CREATE INDEX applications_created_by_status_created_at_id ON app.applications(created_by_id, status, created_at DESC, application_id DESC);
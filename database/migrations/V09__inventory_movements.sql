@@ -0,0 +1,14 @@
+CREATE TABLE app.inventory_movements (
+    id BIGSERIAL PRIMARY KEY,
+    application_id TEXT NOT NULL,
+    warehouse_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    delta BIGINT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+
+    UNIQUE (application_id, warehouse_id, item_id)
+);
+
+CREATE INDEX inventory_movements_created_at ON app.inventory_movements(created_at);
+
+CREATE INDEX inventory_movements_warehouse_item ON app.inventory_movements(warehouse_id, item_id, created_at);
@@ -0,0 +1,9 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX items_search_text_trgm ON app.items USING GIN (
+    (
+        item_name || ' ' || COALESCE(manufacturer, '') || ' ' || COALESCE(model, '') || ' ' || COALESCE(description, '')
+    ) gin_trgm_ops
+) WHERE NOT is_deleted;
+
+CREATE INDEX items_codes ON app.items USING GIN (codes) WHERE NOT is_deleted;
@@ -0,0 +1,4 @@
+CREATE TABLE app.warehouse_stock_versions (
+    warehouse_id TEXT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
@@ -0,0 +1,24 @@
+CREATE TABLE app.warehouse_reservations (
+    warehouse_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    reserved BIGINT NOT NULL,
+
+    PRIMARY KEY (warehouse_id, item_id)
+);
+
+INSERT INTO
+    app.warehouse_reservations (warehouse_id, item_id, reserved)
+SELECT
+    a.sent_from_warehouse_id,
+    p.item_id,
+    SUM(p.count::BIGINT)
+FROM
+    app.applications AS a
+    CROSS JOIN LATERAL jsonb_each_text(a.payload) AS p(item_id, count)
+WHERE
+    a.status = 'pending'
+    AND a.sent_from_warehouse_id IS NOT NULL
+    AND (a.sent_to_warehouse_id IS NULL OR a.type = 'send')
+GROUP BY
+    a.sent_from_warehouse_id,
+    p.item_id;
@@ -0,0 +1,7 @@
+CREATE TABLE app.stock_thresholds (
+    warehouse_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    threshold BIGINT NOT NULL,
+
+    PRIMARY KEY (warehouse_id, item_id)
+);
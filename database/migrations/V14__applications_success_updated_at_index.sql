@@ -0,0 +1,3 @@
+-- Report rows are read by updated_at of successful applications, the live
+-- edges of a cached report only cover a few hours.
+CREATE INDEX applications_success_updated_at ON app.applications(updated_at) WHERE status = 'success';
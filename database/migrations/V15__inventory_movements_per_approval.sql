@@ -0,0 +1,9 @@
+-- A patched successful application goes back to pending and may be
+-- approved again, so movements are unique per approval, which is told
+-- apart by its time.
+ALTER TABLE app.inventory_movements
+    DROP CONSTRAINT inventory_movements_application_id_warehouse_id_item_id_key;
+
+ALTER TABLE app.inventory_movements
+    ADD CONSTRAINT inventory_movements_approval_key
+    UNIQUE (application_id, created_at, warehouse_id, item_id);
@@ -0,0 +1,124 @@
+"""
+Fills app.inventory_movements for successful applications approved before
+the ledger existed. Movements follow the same rules as approve_application
+and the ones already recorded for the latest approval of an application
+are skipped, so the tool can be rerun safely.
+
+Usage (with the PG* variables of the database set):
+    python tools/backfill_inventory_movements.py --batch-size 5000
+"""
+import argparse
+import os
+
+from sqlalchemy import create_engine, text
+
+BACKFILL_BATCH = text(
+    """
+WITH batch AS (
+    SELECT
+        application_id,
+        type,
+        payload,
+        sent_from_warehouse_id,
+        sent_to_warehouse_id,
+        updated_at
+    FROM
+        app.applications
+    WHERE
+        status = 'success'
+        AND serial_number > :after
+        AND serial_number <= :until
+),
+movements AS (
+    SELECT
+        b.application_id,
+        b.sent_from_warehouse_id AS warehouse_id,
+        p.item_id,
+        -p.count::BIGINT AS delta,
+        b.updated_at
+    FROM
+        batch AS b
+        CROSS JOIN LATERAL jsonb_each_text(b.payload) AS p(item_id, count)
+    WHERE
+        b.sent_from_warehouse_id IS NOT NULL
+        AND (b.sent_to_warehouse_id IS NULL OR b.type = 'send')
+    UNION ALL
+    SELECT
+        b.application_id,
+        b.sent_to_warehouse_id AS warehouse_id,
+        p.item_id,
+        p.count::BIGINT AS delta,
+        b.updated_at
+    FROM
+        batch AS b
+        CROSS JOIN LATERAL jsonb_each_text(b.payload) AS p(item_id, count)
+    WHERE
+        b.sent_to_warehouse_id IS NOT NULL
+        AND (b.sent_from_warehouse_id IS NULL OR b.type = 'recieve')
+)
+INSERT INTO
+    app.inventory_movements (
+        application_id,
+        warehouse_id,
+        item_id,
+        delta,
+        created_at
+    )
+SELECT
+    application_id,
+    warehouse_id,
+    item_id,
+    delta,
+    updated_at
+FROM
+    movements AS m
+WHERE
+    m.delta <> 0
+    AND NOT EXISTS (
+        SELECT
+        FROM
+            app.inventory_movements AS r
+        WHERE
+            r.application_id = m.application_id
+            AND r.created_at = m.updated_at
+            AND r.warehouse_id = m.warehouse_id
+            AND r.item_id = m.item_id
+    );
+"""
+)
+
+MAX_SERIAL_NUMBER = text("SELECT COALESCE(MAX(serial_number), 0) FROM app.applications")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    database_url = "postgresql://{}:{}@{}:{}/{}".format(
+        os.environ.get("PGUSER"),
+        os.environ.get("PGPASSWORD"),
+        os.environ.get("PGHOST", "localhost"),
+        os.environ.get("PGPORT", "5432"),
+        os.environ.get("PGDATABASE"),
+    )
+    engine = create_engine(database_url)
+
+    with engine.connect() as connection:
+        max_serial_number = connection.execute(MAX_SERIAL_NUMBER).scalar()
+
+    inserted = 0
+    for after in range(0, max_serial_number, args.batch_size):
+        with engine.begin() as connection:
+            result = connection.execute(
+                BACKFILL_BATCH, {"after": after, "until": after + args.batch_size}
+            )
+            inserted += result.rowcount
+        print(
+            f"processed applications up to #{min(after + args.batch_size, max_serial_number)}, "
+            f"{inserted} movements inserted"
+        )
+
+
+if __name__ == "__main__":
+    main()
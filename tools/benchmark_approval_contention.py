@@ -0,0 +1,206 @@
+"""
+Approves many pending applications in parallel, all moving a small set of
+hot items back and forth between two warehouses, and reports throughput
+and how many approvals were aborted by deadlocks or serialization
+failures (retried ones and ones that failed for good).
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/benchmark_approval_contention.py --applications 2000 --threads 16
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+SETUP_WAREHOUSES = """
+INSERT INTO
+    app.warehouse (id, warehouse_name, address, created_at, updated_at)
+SELECT
+    id,
+    id,
+    '',
+    now(),
+    now()
+FROM
+    UNNEST(CAST(:warehouse_ids AS TEXT [])) AS id
+"""
+SETUP_ITEMS = """
+INSERT INTO
+    app.items (id, item_name, codes, created_at, updated_at)
+SELECT
+    id,
+    id,
+    ARRAY[]::TEXT [],
+    now(),
+    now()
+FROM
+    UNNEST(CAST(:item_ids AS TEXT [])) AS id
+"""
+SETUP_STOCK = """
+INSERT INTO
+    app.warehouse_to_items (warehouse_id, item_id, count)
+SELECT
+    w,
+    i,
+    :count
+FROM
+    UNNEST(CAST(:warehouse_ids AS TEXT [])) AS w
+    CROSS JOIN UNNEST(CAST(:item_ids AS TEXT [])) AS i
+"""
+SETUP_APPLICATIONS = """
+INSERT INTO
+    app.applications (
+        application_id,
+        description,
+        type,
+        status,
+        payload,
+        created_by_id,
+        sent_from_warehouse_id,
+        sent_to_warehouse_id,
+        created_at,
+        updated_at
+    )
+SELECT
+    a.id,
+    '',
+    'send',
+    'pending',
+    CAST(a.payload AS JSONB),
+    :user_id,
+    a.sent_from,
+    a.sent_to,
+    now() + a.n * INTERVAL '1 microsecond',
+    now()
+FROM
+    UNNEST(
+        CAST(:ids AS TEXT []),
+        CAST(:payloads AS TEXT []),
+        CAST(:sent_froms AS TEXT []),
+        CAST(:sent_tos AS TEXT [])
+    ) WITH ORDINALITY AS a(id, payload, sent_from, sent_to, n)
+"""
+SETUP_RESERVATIONS = """
+INSERT INTO
+    app.warehouse_reservations (warehouse_id, item_id, reserved)
+SELECT
+    a.sent_from_warehouse_id,
+    p.item_id,
+    SUM(p.count::BIGINT)
+FROM
+    app.applications AS a
+    CROSS JOIN LATERAL jsonb_each_text(a.payload) AS p(item_id, count)
+WHERE
+    a.application_id = ANY(:ids)
+GROUP BY
+    a.sent_from_warehouse_id,
+    p.item_id
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applications", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--hot-items", type=int, default=20)
+    parser.add_argument("--items-per-application", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["DB_POOL_SIZE"] = str(args.threads)
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from fastapi import HTTPException
+    from sqlalchemy import exc, text
+
+    from src.models import applications
+    from src.models.connector import db_connector, transaction_retries
+    from src.models.queries import query_registry
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    rng = random.Random(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+    warehouse_ids = [f"contention-{run_id}-{index}" for index in range(2)]
+    item_ids = [f"contention-{run_id}-item-{index}" for index in range(args.hot_items)]
+    application_ids = []
+    payloads = []
+    sent_froms = []
+    sent_tos = []
+    for index in range(args.applications):
+        sent_from, sent_to = rng.sample(warehouse_ids, 2)
+        application_ids.append(f"contention-{run_id}-application-{index}")
+        payloads.append(
+            json.dumps(
+                {
+                    item_id: 1
+                    for item_id in rng.sample(item_ids, args.items_per_application)
+                }
+            )
+        )
+        sent_froms.append(sent_from)
+        sent_tos.append(sent_to)
+
+    with engine.connect() as connection:
+        connection.execute(text(SETUP_WAREHOUSES), {"warehouse_ids": warehouse_ids})
+        connection.execute(text(SETUP_ITEMS), {"item_ids": item_ids})
+        connection.execute(
+            text(SETUP_STOCK),
+            {
+                "warehouse_ids": warehouse_ids,
+                "item_ids": item_ids,
+                "count": args.applications,
+            },
+        )
+        connection.execute(
+            text(SETUP_APPLICATIONS),
+            {
+                "ids": application_ids,
+                "payloads": payloads,
+                "sent_froms": sent_froms,
+                "sent_tos": sent_tos,
+                "user_id": run_id,
+            },
+        )
+        connection.execute(text(SETUP_RESERVATIONS), {"ids": application_ids})
+        connection.commit()
+
+    aborted = []
+    rejected = []
+
+    def approve(application_id: str):
+        try:
+            applications.approve_application(engine, application_id, run_id)
+        except exc.OperationalError as error:
+            aborted.append(getattr(error.orig, "pgcode", None))
+        except HTTPException as error:
+            rejected.append(error.detail)
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(approve, application_ids))
+    elapsed = time.perf_counter() - started_at
+
+    retries = sum(transaction_retries.collect().values())
+    approved = args.applications - len(aborted) - len(rejected)
+    print(
+        f"{approved} of {args.applications} approved in {elapsed:.2f}s "
+        f"({approved / elapsed:.1f}/s) with {args.threads} threads; "
+        f"retried {retries} ({retries / args.applications:.1%}), "
+        f"aborted {len(aborted)} ({len(aborted) / args.applications:.1%}), "
+        f"rejected {len(rejected)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares throughput of concurrent slow queries when handlers run the
+synchronous engine inside the event loop (old `async def` routers) and when
+they are dispatched to the threadpool (plain `def` routers, which is what
+FastAPI does for them).
+
+Usage (from the repository root, with the PG* variables of the database set):
+    python tools/benchmark_blocking_queries.py --requests 40 --delay 0.2
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import create_engine, text
+from starlette.concurrency import run_in_threadpool
+
+SLOW_QUERY = text("SELECT pg_sleep(:delay)")
+
+
+def run_slow_query(engine, delay: float):
+    with engine.connect() as connection:
+        connection.execute(SLOW_QUERY, {"delay": delay})
+        connection.commit()
+
+
+async def blocking_handler(engine, delay: float):
+    run_slow_query(engine, delay)
+
+
+async def threadpool_handler(engine, delay: float):
+    await run_in_threadpool(run_slow_query, engine, delay)
+
+
+async def measure(handler, engine, requests: int, delay: float) -> float:
+    started_at = time.perf_counter()
+    await asyncio.gather(*(handler(engine, delay) for _ in range(requests)))
+    return time.perf_counter() - started_at
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--pool-size", type=int, default=20)
+    args = parser.parse_args()
+
+    database_url = "postgresql://{}:{}@{}:{}/{}".format(
+        os.environ.get("PGUSER"),
+        os.environ.get("PGPASSWORD"),
+        os.environ.get("PGHOST", "localhost"),
+        os.environ.get("PGPORT", "5432"),
+        os.environ.get("PGDATABASE"),
+    )
+    engine = create_engine(database_url, pool_size=args.pool_size, max_overflow=0)
+
+    for name, handler in (
+        ("blocking (before)", blocking_handler),
+        ("threadpool (after)", threadpool_handler),
+    ):
+        elapsed = asyncio.run(measure(handler, engine, args.requests, args.delay))
+        print(
+            f"{name:>20}: {args.requests} requests in {elapsed:.2f}s, "
+            f"{args.requests / elapsed:.1f} req/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
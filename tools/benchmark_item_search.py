@@ -0,0 +1,107 @@
+"""
+Seeds item cards and times /items/search for a broad query, a 3 character
+pattern matching a large share of the cards, on its first page and on a
+page deep into the matches, plus a narrow query and a code. Prints the
+plans of the broad query and of the code, so they show whether the
+indexes of V10__items_search_indexes.sql are used; without pg_trgm on the
+server the narrow query is served by a sequential scan.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/benchmark_item_search.py --items 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+SETUP_ITEMS = """
+INSERT INTO
+    app.items (id, item_name, manufacturer, model, codes, created_at, updated_at)
+SELECT
+    :run_id || '-' || lpad(n::TEXT, 8, '0'),
+    CASE WHEN n % 3 = 0 THEN 'Кабель ' ELSE 'Разъем ' END || n,
+    'manufacturer ' || n % 100,
+    'model ' || n,
+    ARRAY[:run_id || '-code-' || n],
+    now(),
+    now()
+FROM
+    generate_series(1, :items) AS n
+"""
+HAS_TRIGRAM_INDEX = """
+SELECT EXISTS (
+    SELECT FROM pg_indexes WHERE indexname = 'items_search_text_trgm'
+)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from sqlalchemy import text
+
+    from src.models import items
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    with engine.connect() as connection:
+        connection.execute(text(SETUP_ITEMS), {"run_id": run_id, "items": args.items})
+        connection.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE app.items"))
+        has_index = connection.execute(text(HAS_TRIGRAM_INDEX)).scalar()
+    print(
+        f"seeded {args.items} cards, trigram index "
+        f"{'present' if has_index else 'missing'}"
+    )
+
+    def measure(name: str, query, code, cursor=None):
+        timings = []
+        for _ in range(args.repeats):
+            started_at = time.perf_counter()
+            result = items.search_items(engine, query, code, cursor, args.limit)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        timings.sort()
+        print(
+            f"{name}: {len(result.items)} items, "
+            f"p50 {timings[len(timings) // 2]:.2f}ms, min {timings[0]:.2f}ms"
+        )
+
+    broad = "Каб"
+    measure("broad, first page", broad, None)
+    deep_cursor = f"{run_id}-{args.items * 9 // 10:08d}"
+    measure("broad, page at 90%", broad, None, deep_cursor)
+    measure("narrow", f"Кабель {args.items // 2 // 3 * 3}", None)
+    measure("code", None, f"{run_id}-code-{args.items // 2}")
+
+    with engine.connect() as connection:
+        for query, plan_args in (
+            (items.SEARCH_ITEMS, {"pattern": f"%{broad}%"}),
+            (items.SEARCH_ITEMS_BY_CODE, {"pattern": None, "code": f"{run_id}-code-1"}),
+        ):
+            plan = connection.execute(
+                text(f"EXPLAIN {query.clause.text}"),
+                {**plan_args, "cursor": None, "limit": args.limit},
+            ).scalars()
+            print(f"\n{query.name}:")
+            print("\n".join(plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Measures password verification throughput for a burst of concurrent logins
+and the longest event loop stall it causes: inline in the event loop (the
+old /token handler), on request threads, and through the process pool of
+src.utils.passwords.
+
+Usage (from the repository root):
+    PASSWORD_HASH_WORKERS=4 python tools/benchmark_login.py --logins 32
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from src.utils import passwords  # noqa: E402
+
+PASSWORD = "benchmark-password"
+TICK_SECONDS = 0.01
+
+
+async def measure_stall(done: asyncio.Event) -> float:
+    max_stall = 0.0
+    while not done.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        max_stall = max(max_stall, time.perf_counter() - started_at - TICK_SECONDS)
+    return max_stall
+
+
+async def run_burst(logins) -> float:
+    done = asyncio.Event()
+    stall = asyncio.ensure_future(measure_stall(done))
+    await asyncio.sleep(0)
+    await logins()
+    done.set()
+    return await stall
+
+
+async def inline_logins(password_hash: str, logins: int):
+    for _ in range(logins):
+        passwords.pwd_context.verify_and_update(PASSWORD, password_hash)
+
+
+async def threaded_logins(password_hash: str, logins: int, verify):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=logins) as executor:
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, verify, PASSWORD, password_hash)
+                for _ in range(logins)
+            )
+        )
+
+
+def report(name: str, logins: int, elapsed: float, stall: float):
+    print(
+        f"{name:>24}: {logins / elapsed:.1f} logins/s ({elapsed:.2f}s), "
+        f"longest event loop stall {stall * 1000:.0f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+
+    password_hash = passwords.pwd_context.hash(PASSWORD)
+    passwords.verify_and_update(PASSWORD, password_hash)  # start pool workers
+
+    for name, coroutine in (
+        ("event loop (before)", lambda: inline_logins(password_hash, args.logins)),
+        (
+            "request threads",
+            lambda: threaded_logins(
+                password_hash, args.logins, passwords.pwd_context.verify_and_update
+            ),
+        ),
+        (
+            "process pool (after)",
+            lambda: threaded_logins(
+                password_hash, args.logins, passwords.verify_and_update
+            ),
+        ),
+    ):
+        started_at = time.perf_counter()
+        stall = asyncio.run(run_burst(coroutine))
+        report(name, args.logins, time.perf_counter() - started_at, stall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compares the per-row pydantic report builder that used to live in
+ReportGenerator with the columnar one from src.utils.report_frames on
+synthetic data, without a database.
+
+Usage (from the repository root):
+    python tools/benchmark_report_builder.py --lines 1000000
+"""
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+import time
+import typing
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from src.utils.report_frames import (  # noqa: E402
+    MOSCOW_TIMEZONE,
+    REPORT_TIME_FORMAT,
+    build_raw_frame,
+    format_report_frame,
+    frame_to_rows,
+)
+
+ITEMS_PER_APPLICATION = 10
+ITEMS_COUNT = 5000
+WAREHOUSES_COUNT = 20
+
+DbApplication = namedtuple(
+    "DbApplication",
+    ["sent_from_warehouse_id", "sent_to_warehouse_id", "payload", "updated_at", "type"],
+)
+
+
+class RawRow(BaseModel):
+    warehouse_id: str
+    item_id: str
+    count: int
+    deposited_at: typing.Optional[datetime] = None
+    deducted_at: typing.Optional[datetime] = None
+
+
+def make_applications(lines: int) -> typing.List[DbApplication]:
+    started_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    applications = []
+    for index in range(lines // ITEMS_PER_APPLICATION):
+        applications.append(
+            DbApplication(
+                sent_from_warehouse_id=f"w{index % WAREHOUSES_COUNT}",
+                sent_to_warehouse_id=f"w{(index + 1) % WAREHOUSES_COUNT}",
+                payload={
+                    f"i{(index + offset) % ITEMS_COUNT}": offset + 1
+                    for offset in range(ITEMS_PER_APPLICATION)
+                },
+                updated_at=started_at + timedelta(seconds=index),
+                type="recieve" if index % 2 else "use",
+            )
+        )
+    return applications
+
+
+def legacy_report(applications, items, warehouses) -> typing.List[tuple]:
+    rows = []
+    for row in applications:
+        rows.extend(
+            [
+                RawRow(
+                    warehouse_id=row.sent_to_warehouse_id
+                    if row.type == "recieve"
+                    else row.sent_from_warehouse_id,
+                    item_id=key,
+                    count=value,
+                    deposited_at=row.updated_at if row.type == "recieve" else None,
+                    deducted_at=row.updated_at if row.type != "recieve" else None,
+                )
+                for key, value in row.payload.items()
+            ]
+        )
+    return [
+        (
+            items.get(row.item_id)[0],
+            items.get(row.item_id)[1],
+            row.count,
+            warehouses.get(row.warehouse_id),
+            row.deposited_at.astimezone(MOSCOW_TIMEZONE).strftime(REPORT_TIME_FORMAT)
+            if row.deposited_at
+            else None,
+            row.deducted_at.astimezone(MOSCOW_TIMEZONE).strftime(REPORT_TIME_FORMAT)
+            if row.deducted_at
+            else None,
+        )
+        for row in rows
+    ]
+
+
+def expand_like_sql(applications, items, warehouses) -> typing.List[tuple]:
+    # Rows in the shape reports/get_report_rows.sql returns them.
+    return [
+        (
+            items[item_id][0],
+            items[item_id][1],
+            count,
+            warehouses[
+                row.sent_to_warehouse_id
+                if row.type == "recieve"
+                else row.sent_from_warehouse_id
+            ],
+            row.type == "recieve",
+            row.updated_at,
+        )
+        for row in applications
+        for item_id, count in row.payload.items()
+    ]
+
+
+def columnar_report(sql_rows) -> typing.List[tuple]:
+    return frame_to_rows(format_report_frame(build_raw_frame(sql_rows)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    items = {
+        f"i{index}": (f"maker {index % 50}", f"model {index}")
+        for index in range(ITEMS_COUNT)
+    }
+    warehouses = {
+        f"w{index}": f"warehouse {index}" for index in range(WAREHOUSES_COUNT)
+    }
+    applications = make_applications(args.lines)
+    sql_rows = expand_like_sql(applications, items, warehouses)
+
+    started_at = time.perf_counter()
+    legacy = legacy_report(applications, items, warehouses)
+    legacy_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    columnar = columnar_report(sql_rows)
+    columnar_seconds = time.perf_counter() - started_at
+
+    assert legacy == columnar, "builders disagree"
+    print(f"payload lines: {len(legacy)}")
+    print(f"legacy:   {legacy_seconds:.2f}s")
+    print(
+        f"columnar: {columnar_seconds:.2f}s ({legacy_seconds / columnar_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Seeds a year of successful applications and times monthly and yearly
+reports built without the per-day cache, on the first cached run and on
+repeated runs. Every cached report is checked against the uncached one.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/benchmark_report_days.py --days 365 --applications-per-day 200
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+import time
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+SETUP_WAREHOUSE = """
+INSERT INTO
+    app.warehouse (id, warehouse_name, address, created_at, updated_at)
+VALUES
+    (:warehouse_id, :warehouse_id, '', now(), now())
+"""
+SETUP_ITEMS = """
+INSERT INTO
+    app.items (id, item_name, manufacturer, model, codes, created_at, updated_at)
+SELECT
+    :run_id || '-item-' || n,
+    'item ' || n,
+    'manufacturer ' || n % 10,
+    'model ' || n,
+    ARRAY[]::TEXT [],
+    now(),
+    now()
+FROM
+    generate_series(1, :items) AS n
+"""
+SETUP_APPLICATIONS = """
+INSERT INTO
+    app.applications (
+        application_id,
+        description,
+        type,
+        status,
+        payload,
+        created_by_id,
+        sent_from_warehouse_id,
+        sent_to_warehouse_id,
+        created_at,
+        updated_at
+    )
+SELECT
+    :run_id || '-application-' || n,
+    '',
+    CAST(CASE WHEN n % 2 = 0 THEN 'recieve' ELSE 'use' END AS app.application_type),
+    'success',
+    jsonb_build_object(
+        :run_id || '-item-' || (n % :items + 1), 1,
+        :run_id || '-item-' || ((n + 7) % :items + 1), 2,
+        :run_id || '-item-' || ((n + 13) % :items + 1), 3
+    ),
+    :run_id,
+    CASE WHEN n % 2 = 0 THEN NULL ELSE :warehouse_id END,
+    CASE WHEN n % 2 = 0 THEN :warehouse_id ELSE NULL END,
+    :now - n * :step,
+    :now - n * :step
+FROM
+    generate_series(1, :applications) AS n
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--applications-per-day", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from sqlalchemy import text
+
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+    from src.models.reports import Interval, ReportGenerator
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    applications = args.days * args.applications_per_day
+    with engine.connect() as connection:
+        connection.execute(text(SETUP_WAREHOUSE), {"warehouse_id": run_id})
+        connection.execute(text(SETUP_ITEMS), {"run_id": run_id, "items": args.items})
+        connection.execute(
+            text(SETUP_APPLICATIONS),
+            {
+                "run_id": run_id,
+                "items": args.items,
+                "warehouse_id": run_id,
+                "applications": applications,
+                "now": now,
+                "step": timedelta(days=1) / args.applications_per_day,
+            },
+        )
+        connection.commit()
+    print(f"seeded {applications} applications over {args.days} days")
+
+    uncached = ReportGenerator(engine)
+    uncached.day_cache = None
+    cached = ReportGenerator(engine)
+    for name, days in (("month", 30), ("year", args.days)):
+        interval = Interval(from_date=now - timedelta(days=days), to_date=now)
+
+        started_at = time.perf_counter()
+        expected = uncached.prepare_report(interval)
+        uncached_ms = (time.perf_counter() - started_at) * 1000
+
+        started_at = time.perf_counter()
+        report = cached.prepare_report(interval)
+        first_ms = (time.perf_counter() - started_at) * 1000
+        assert report == expected
+
+        timings = []
+        for _ in range(args.repeats):
+            started_at = time.perf_counter()
+            report = cached.prepare_report(interval)
+            timings.append((time.perf_counter() - started_at) * 1000)
+            assert report == expected
+        assert list(cached.iter_report_rows(interval)) == expected.items
+        print(
+            f"{name}: {len(expected.items)} rows, uncached {uncached_ms:.0f}ms, "
+            f"first cached {first_ms:.0f}ms, repeated {min(timings):.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
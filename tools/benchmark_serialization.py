@@ -0,0 +1,218 @@
+"""
+Compares building and serializing large /items/list and /applications/list
+responses the old way (validated models, then FastAPI validating and
+encoding them again for the response_model) with the trusted models and
+ModelResponse from src.utils.serialization, on synthetic rows.
+
+Usage (from the repository root):
+    python tools/benchmark_serialization.py --items 50000 --applications 5000
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import os
+import sys
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from src.models.applications import (  # noqa: E402
+    Application,
+    ApplicationData,
+    ApplicationPayload,
+    ApplicationsList,
+    ApplicationStatus,
+    ApplicationType,
+)
+from src.models.items import Item, ItemWithCount, ListItems  # noqa: E402
+from src.models.users import ApiUser  # noqa: E402
+from src.models.warehouse import SimpleWarehouse  # noqa: E402
+from src.utils.serialization import ModelResponse, trusted  # noqa: E402
+
+ITEMS_PER_APPLICATION = 10
+
+
+def make_item_rows(count: int):
+    return [
+        {
+            "id": f"item-{i}",
+            "item_name": f"Item {i}",
+            "item_type": None,
+            "manufacturer": f"Manufacturer {i % 50}",
+            "model": f"MD-{i}",
+            "description": "Description of the item card",
+            "codes": [f"EAN{i}", f"SKU{i}"],
+        }
+        for i in range(count)
+    ]
+
+
+def make_application_rows(count: int, item_rows):
+    now = datetime.now(timezone.utc)
+    user = {
+        "username": "reviewer",
+        "first_name": "First",
+        "last_name": "Last",
+        "phone_number": "+70000000000",
+        "warehouses": ["warehouse-1"],
+        "is_admin": True,
+        "is_reviewer": True,
+        "is_superuser": False,
+    }
+    warehouse = {"warehouse_name": "Warehouse", "address": "Address"}
+    return [
+        {
+            "id": f"application-{i}",
+            "serial_number": i,
+            "description": "Application",
+            "type": "send",
+            "status": "pending",
+            "created_by": user,
+            "sent_from_warehouse": warehouse,
+            "payload": [
+                (item_rows[(i + j) % len(item_rows)], j + 1)
+                for j in range(ITEMS_PER_APPLICATION)
+            ],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_items_validated(rows):
+    return ListItems(items=[Item(**row) for row in rows])
+
+
+def build_items_trusted(rows):
+    return trusted(ListItems, {"items": [trusted(Item, dict(row)) for row in rows]})
+
+
+def build_applications_validated(rows):
+    return ApplicationsList(
+        items=[
+            Application(
+                id=row["id"],
+                application_data=ApplicationData(
+                    serial_number=row["serial_number"],
+                    description=row["description"],
+                    type=row["type"],
+                    status=row["status"],
+                    created_by=ApiUser(**row["created_by"]),
+                    finished_by=None,
+                    sent_from_warehouse=SimpleWarehouse(**row["sent_from_warehouse"]),
+                    sent_to_warehouse=None,
+                    linked_to_application_id=None,
+                ),
+                application_payload=ApplicationPayload(
+                    items=[
+                        ItemWithCount(**item, count=count)
+                        for item, count in row["payload"]
+                    ]
+                ),
+                created_at=row["created_at"],
+                updated_at=row["updated_at"],
+            )
+            for row in rows
+        ],
+        cursor=None,
+    )
+
+
+def build_applications_trusted(rows):
+    items = []
+    for row in rows:
+        application_data = trusted(
+            ApplicationData,
+            {
+                "serial_number": row["serial_number"],
+                "description": row["description"],
+                "type": ApplicationType(row["type"]),
+                "status": ApplicationStatus(row["status"]),
+                "created_by": trusted(ApiUser, dict(row["created_by"])),
+                "finished_by": None,
+                "sent_from_warehouse": trusted(
+                    SimpleWarehouse, dict(row["sent_from_warehouse"])
+                ),
+                "sent_to_warehouse": None,
+                "linked_to_application_id": None,
+            },
+        )
+        payload = trusted(
+            ApplicationPayload,
+            {
+                "items": [
+                    trusted(ItemWithCount, {**item, "count": count})
+                    for item, count in row["payload"]
+                ]
+            },
+        )
+        items.append(
+            trusted(
+                Application,
+                {
+                    "id": row["id"],
+                    "application_data": application_data,
+                    "application_payload": payload,
+                    "created_at": row["created_at"],
+                    "updated_at": row["updated_at"],
+                },
+            )
+        )
+    return trusted(ApplicationsList, {"items": items, "cursor": None})
+
+
+def render_through_response_model(model_class, content) -> bytes:
+    field = create_response_field(name="response", type_=model_class)
+    encoded = asyncio.run(
+        serialize_response(field=field, response_content=content, is_coroutine=False)
+    )
+    return JSONResponse(encoded).body
+
+
+def measure(name: str, model_class, rows, build_validated, build_trusted):
+    started_at = time.perf_counter()
+    before = render_through_response_model(model_class, build_validated(rows))
+    elapsed_before = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    after = ModelResponse(build_trusted(rows)).body
+    elapsed_after = time.perf_counter() - started_at
+
+    assert len(before) == len(after), "responses differ"
+    print(
+        f"{name:>18}: {elapsed_before * 1000:8.0f}ms -> {elapsed_after * 1000:6.0f}ms "
+        f"({elapsed_before / elapsed_after:.1f}x), {len(after) / 1e6:.1f}MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--applications", type=int, default=5000)
+    args = parser.parse_args()
+
+    item_rows = make_item_rows(args.items)
+    application_rows = make_application_rows(args.applications, item_rows)
+    measure(
+        "/items/list",
+        ListItems,
+        item_rows,
+        build_items_validated,
+        build_items_trusted,
+    )
+    measure(
+        "/applications/list",
+        ApplicationsList,
+        application_rows,
+        build_applications_validated,
+        build_applications_trusted,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Checks that a page of /applications/list is built with the same number
+of statements whatever its size. Seeds applications that each have their
+own creator, reviewer, warehouses and items, so any per-row lookup would
+show up, then counts statements sent to the database for pages of 1, 10
+and 100 applications. Exits with 1 if the counts differ.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/check_application_list_queries.py
+"""
+import os
+import sys
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+SETUP_USERS = """
+INSERT INTO
+    app.users (
+        id, username, first_name, last_name, password_hash, phone_number,
+        created_at, updated_at
+    )
+SELECT
+    :run_id || '-user-' || n,
+    :run_id || '-user-' || n,
+    '',
+    '',
+    '',
+    '',
+    now() + n * INTERVAL '1 microsecond',
+    now() + n * INTERVAL '1 microsecond'
+FROM
+    generate_series(1, 2 * :applications) AS n
+"""
+SETUP_WAREHOUSES = """
+INSERT INTO
+    app.warehouse (id, warehouse_name, address, created_at, updated_at)
+SELECT
+    :run_id || '-warehouse-' || n,
+    :run_id || '-warehouse-' || n,
+    '',
+    now(),
+    now()
+FROM
+    generate_series(1, 2 * :applications) AS n
+"""
+SETUP_ITEMS = """
+INSERT INTO
+    app.items (id, item_name, codes, created_at, updated_at)
+SELECT
+    :run_id || '-item-' || n,
+    :run_id || '-item-' || n,
+    ARRAY[]::TEXT [],
+    now(),
+    now()
+FROM
+    generate_series(1, 3 * :applications) AS n
+"""
+SETUP_APPLICATIONS = """
+INSERT INTO
+    app.applications (
+        application_id,
+        description,
+        type,
+        status,
+        payload,
+        created_by_id,
+        finished_by_id,
+        sent_from_warehouse_id,
+        sent_to_warehouse_id,
+        created_at,
+        updated_at
+    )
+SELECT
+    :run_id || '-application-' || n,
+    '',
+    'send',
+    'success',
+    jsonb_build_object(
+        :run_id || '-item-' || (3 * n - 2), 1,
+        :run_id || '-item-' || (3 * n - 1), 2,
+        :run_id || '-item-' || (3 * n), 3
+    ),
+    :run_id || '-user-' || (2 * n - 1),
+    :run_id || '-user-' || (2 * n),
+    :run_id || '-warehouse-' || (2 * n - 1),
+    :run_id || '-warehouse-' || (2 * n),
+    now() + n * INTERVAL '1 microsecond',
+    now()
+FROM
+    generate_series(1, :applications) AS n
+"""
+PAGE_SIZES = (1, 10, 100)
+
+
+def main():
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from sqlalchemy import event, text
+
+    from src.models import applications
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    args = {"run_id": run_id, "applications": max(PAGE_SIZES)}
+    with engine.connect() as connection:
+        for statement in (
+            SETUP_USERS,
+            SETUP_WAREHOUSES,
+            SETUP_ITEMS,
+            SETUP_APPLICATIONS,
+        ):
+            connection.execute(text(statement), args)
+        connection.commit()
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda connection, cursor, statement, *args: statements.append(statement),
+    )
+    counts = {}
+    for limit in PAGE_SIZES:
+        statements.clear()
+        page = applications.get_applications_list(engine, None, None, limit, None)
+        assert len(page.items) == limit, len(page.items)
+        counts[limit] = len(statements)
+        print(f"page of {limit}: {counts[limit]} statements")
+
+    if len(set(counts.values())) != 1:
+        print("statement count depends on the page size")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
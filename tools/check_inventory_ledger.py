@@ -0,0 +1,167 @@
+"""
+Checks that app.inventory_movements explains the stock when an approved
+application is patched back to pending and approved again: receives items
+on a warehouse, approves a transfer to another one, patches the transfer,
+approves it once more and compares the sums of movements per (warehouse,
+item) with the counts on the warehouses. Exits with 1 if they differ.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/check_inventory_ledger.py
+"""
+from datetime import datetime
+import os
+import sys
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+SETUP_USER = """
+INSERT INTO
+    app.users (
+        id, username, first_name, last_name, password_hash, phone_number,
+        created_at, updated_at, is_admin, is_reviewer
+    )
+VALUES
+    (:run_id, :run_id, '', '', '', '', now(), now(), TRUE, TRUE)
+"""
+SETUP_WAREHOUSES = """
+INSERT INTO
+    app.warehouse (id, warehouse_name, address, created_at, updated_at)
+SELECT
+    id,
+    id,
+    '',
+    now(),
+    now()
+FROM
+    UNNEST(CAST(:warehouse_ids AS TEXT [])) AS id
+"""
+SETUP_ITEMS = """
+INSERT INTO
+    app.items (id, item_name, codes, created_at, updated_at)
+SELECT
+    id,
+    id,
+    ARRAY[]::TEXT [],
+    now(),
+    now()
+FROM
+    UNNEST(CAST(:item_ids AS TEXT [])) AS id
+"""
+GET_LEDGER = """
+SELECT
+    warehouse_id,
+    item_id,
+    SUM(delta) AS count
+FROM
+    app.inventory_movements
+WHERE
+    warehouse_id = ANY(:warehouse_ids)
+GROUP BY
+    warehouse_id,
+    item_id
+"""
+GET_STOCK = """
+SELECT
+    warehouse_id,
+    item_id,
+    count
+FROM
+    app.warehouse_to_items
+WHERE
+    warehouse_id = ANY(:warehouse_ids)
+    AND count <> 0
+"""
+
+
+def main():
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    import psycopg2.extras
+    from sqlalchemy import text
+
+    from src.models import applications
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+
+    # As in src.main, payloads are passed as dicts.
+    psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    warehouse_ids = [f"ledger-{run_id}-{index}" for index in range(2)]
+    item_ids = [f"ledger-{run_id}-item-{index}" for index in range(2)]
+    with engine.connect() as connection:
+        connection.execute(text(SETUP_USER), {"run_id": run_id})
+        connection.execute(text(SETUP_WAREHOUSES), {"warehouse_ids": warehouse_ids})
+        connection.execute(text(SETUP_ITEMS), {"item_ids": item_ids})
+        connection.commit()
+
+    def application(id: str, type: str, payload, sent_from=None, sent_to=None):
+        return applications.InternalApplication(
+            application_id=id,
+            description="",
+            type=type,
+            status=applications.ApplicationStatus.PENDING,
+            payload=payload,
+            created_by_id=run_id,
+            sent_from_warehouse_id=sent_from,
+            sent_to_warehouse_id=sent_to,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+
+    receive = application(
+        f"{run_id}-receive",
+        "recieve",
+        {item_ids[0]: 10, item_ids[1]: 5},
+        sent_to=warehouse_ids[0],
+    )
+    applications.create_application(engine, receive)
+    applications.approve_application(engine, receive.application_id, run_id)
+
+    transfer_id = f"{run_id}-transfer"
+    applications.create_application(
+        engine,
+        application(
+            transfer_id, "send", {item_ids[0]: 3}, warehouse_ids[0], warehouse_ids[1]
+        ),
+    )
+    applications.approve_application(engine, transfer_id, run_id)
+    applications.update_application(
+        engine,
+        application(
+            transfer_id,
+            "send",
+            {item_ids[0]: 4, item_ids[1]: 2},
+            warehouse_ids[0],
+            warehouse_ids[1],
+        ),
+        run_id,
+    )
+    applications.approve_application(engine, transfer_id, run_id)
+
+    with engine.connect() as connection:
+        args = {"warehouse_ids": warehouse_ids}
+        ledger = {
+            (row.warehouse_id, row.item_id): row.count
+            for row in connection.execute(text(GET_LEDGER), args)
+            if row.count
+        }
+        stock = {
+            (row.warehouse_id, row.item_id): row.count
+            for row in connection.execute(text(GET_STOCK), args)
+        }
+    for key in sorted(set(ledger) | set(stock)):
+        print(f"{key}: ledger {ledger.get(key, 0)}, stock {stock.get(key, 0)}")
+    if ledger != stock:
+        print("movements do not add up to the stock")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
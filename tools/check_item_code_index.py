@@ -0,0 +1,89 @@
+"""
+Checks that the in-memory code index ends up with the committed card when
+the same item is updated concurrently: a few threads update one card with
+their own codes while others look its codes up, and after every round the
+card in the index is compared with the one in app.items. Exits with 1 if
+they differ.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/check_item_code_index.py --rounds 50
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from src.models import items
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    item = items.create_item(
+        engine, run_id, items.CreateItem(item_name=run_id, codes=[f"{run_id}-0"])
+    )
+    items.item_code_index.load(engine)
+
+    def update(round: int, writer: int):
+        items.update_item(
+            engine,
+            items.UpdateItem(
+                id=item.id,
+                item_name=f"{run_id} {round} {writer}",
+                codes=[f"{run_id}-{writer}"],
+            ),
+        )
+
+    def look_up():
+        # Codes missing from the index are read from the database and put.
+        items.get_items_by_codes(
+            engine, [f"{run_id}-{writer}" for writer in range(args.writers)]
+        )
+
+    # Switching threads often widens the gap between a commit and the
+    # change of the index that follows it.
+    sys.setswitchinterval(1e-6)
+    failures = 0
+    with ThreadPoolExecutor(args.writers + args.readers) as executor:
+        for round in range(args.rounds):
+            futures = [
+                executor.submit(update, round, writer) for writer in range(args.writers)
+            ]
+            futures += [executor.submit(look_up) for _ in range(args.readers)]
+            for future in futures:
+                future.result()
+            stored = items.get_item_by_id(engine, item.id)
+            found, _ = items.item_code_index.lookup(stored.codes)
+            indexed = found.get(stored.codes[0], [None])[0]
+            if indexed is None or indexed.item_name != stored.item_name:
+                failures += 1
+                print(
+                    f"round {round}: index has "
+                    f"{indexed.item_name if indexed else None}, "
+                    f"database has {stored.item_name}"
+                )
+    print(f"{args.rounds} rounds, {failures} with a stale card in the index")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Checks that importing item cards keeps empty strings apart from missing
+values: imports an ndjson file where some optional fields are empty strings,
+some are missing and some contain tabs, backslashes or a literal \\N, plus
+lines with an empty id or item_name. Exits with 1 if the empty lines are not
+reported as row errors or the stored cards differ from the file.
+
+Usage (from the repository root, with the PG* variables of a migrated
+scratch database set):
+    python tools/check_item_import.py
+"""
+import io
+import json
+import os
+import sys
+import uuid
+
+APP_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "app")
+
+GET_ITEMS = """
+SELECT
+    id,
+    item_name,
+    item_type,
+    manufacturer,
+    model,
+    description,
+    codes
+FROM
+    app.items
+WHERE
+    id LIKE :run_id || '-%'
+"""
+
+
+def main():
+    os.environ.setdefault("PGHOST", "localhost")
+    os.chdir(APP_DIRECTORY)
+    sys.path.insert(0, APP_DIRECTORY)
+
+    from sqlalchemy import text
+
+    from src.models import items
+    from src.models.connector import db_connector
+    from src.models.queries import query_registry
+
+    query_registry.load()
+    engine = db_connector.engine
+
+    run_id = uuid.uuid4().hex[:8]
+    expected = {
+        f"{run_id}-empty": {
+            "item_name": "empty strings",
+            "item_type": "",
+            "manufacturer": "",
+            "model": "",
+            "description": "",
+            "codes": [""],
+        },
+        f"{run_id}-missing": {
+            "item_name": "missing fields",
+            "item_type": None,
+            "manufacturer": None,
+            "model": None,
+            "description": None,
+            "codes": [],
+        },
+        f"{run_id}-escapes": {
+            "item_name": "tab\tand new\nline",
+            "item_type": "\\N",
+            "manufacturer": "back\\slash",
+            "model": "\\",
+            "description": "carriage\rreturn",
+            "codes": ["\\N", "a\tb"],
+        },
+    }
+    lines = [json.dumps({"id": id, **fields}) for id, fields in expected.items()]
+    lines.append(json.dumps({"id": "", "item_name": "no id", "codes": []}))
+    lines.append(json.dumps({"id": f"{run_id}-no-name", "item_name": "", "codes": []}))
+    file = io.BytesIO("\n".join(lines).encode("utf-8"))
+
+    result = items.import_items(engine, file, items.ItemImportFormat.NDJSON)
+    print(result.model_dump_json())
+    failures = []
+    if (result.created, result.failed) != (len(expected), 2):
+        failures.append("expected every card with an id and a name to be created")
+    if [error.line for error in result.errors] != [4, 5]:
+        failures.append("expected the lines with an empty id and name to fail")
+
+    with engine.connect() as connection:
+        stored = {
+            row.id: {key: value for key, value in row._mapping.items() if key != "id"}
+            for row in connection.execute(text(GET_ITEMS), {"run_id": run_id})
+        }
+    for id, fields in expected.items():
+        if stored.get(id) != fields:
+            failures.append(f"{id}: stored {stored.get(id)}, expected {fields}")
+
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
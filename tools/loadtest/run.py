@@ -0,0 +1,414 @@
+"""
+Load test of the API against a local Postgres. Applies database/migrations
+to a fresh database, seeds warehouses, item cards, stock and applications,
+starts uvicorn and drives mixed traffic from async virtual users (see
+scenarios.py). Prints throughput and p50/p95/p99 per endpoint and compares
+them with a stored baseline: the run exits with 1 when an endpoint got
+slower or returned unexpected statuses.
+
+Usage (from the repository root, with the PG* variables of a scratch
+database set; --recreate-database drops it first):
+    pip install -r tools/loadtest/requirements.txt
+    python tools/loadtest/run.py --recreate-database --save-baseline
+    python tools/loadtest/run.py --recreate-database
+"""
+import argparse
+import asyncio
+import csv
+from datetime import datetime, timezone
+import glob
+import io
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+import uuid
+
+import httpx
+import psycopg2
+from passlib.context import CryptContext
+
+import scenarios
+
+REPOSITORY_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "..")
+APP_DIRECTORY = os.path.join(REPOSITORY_DIRECTORY, "app")
+MIGRATIONS_DIRECTORY = os.path.join(REPOSITORY_DIRECTORY, "database", "migrations")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SERVER_LOG = os.path.join(tempfile.gettempdir(), "loadtest-server.log")
+
+USERNAME = "loadtest"
+SEED_STOCK_COUNT = 1000000
+SEED_CONCURRENCY = 16
+SERVER_START_TIMEOUT_SECONDS = 30
+PERCENTILES = (50, 95, 99)
+
+
+def connect(database: typing.Optional[str] = None):
+    return psycopg2.connect(
+        host=os.environ.get("PGHOST", "localhost"),
+        port=os.environ.get("PGPORT", "5432"),
+        user=os.environ.get("PGUSER"),
+        password=os.environ.get("PGPASSWORD"),
+        dbname=database or os.environ.get("PGDATABASE"),
+    )
+
+
+def recreate_database():
+    database = os.environ.get("PGDATABASE")
+    connection = connect("postgres")
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS "{database}"')
+        cursor.execute(f"CREATE DATABASE \"{database}\" ENCODING 'UTF8'")
+    connection.close()
+
+
+def apply_migrations(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_namespace WHERE nspname = 'app'")
+        if cursor.fetchone():
+            print("Schema app exists, migrations are not applied")
+            return
+        for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIRECTORY, "V*.sql"))):
+            with open(path) as migration:
+                cursor.execute(migration.read())
+    connection.commit()
+
+
+def create_superuser(connection, password: str):
+    password_hash = CryptContext(schemes=["sha256_crypt"]).hash(password)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+INSERT INTO
+    app.users (
+        id,
+        username,
+        first_name,
+        last_name,
+        password_hash,
+        phone_number,
+        created_at,
+        updated_at,
+        is_admin,
+        is_reviewer,
+        is_superuser
+    )
+VALUES
+    (%s, %s, 'Load', 'Test', %s, '', now(), now(), TRUE, TRUE, TRUE)
+ON CONFLICT (username) DO UPDATE
+SET
+    password_hash = EXCLUDED.password_hash
+""",
+            (str(uuid.uuid4()), USERNAME, password_hash),
+        )
+    connection.commit()
+
+
+def start_server(port: int, workers: int, log: typing.IO) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.setdefault("JWT_SECRET_KEY", secrets.token_hex(32))
+    env.setdefault("PGHOST", "localhost")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=APP_DIRECTORY,
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def wait_for_server(base_url: str, server: typing.Optional[subprocess.Popen]):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/openapi.json").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not start in {SERVER_START_TIMEOUT_SECONDS}s")
+
+
+def check(response: httpx.Response) -> httpx.Response:
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"Seeding failed on {response.request.method} {response.request.url}: "
+            f"{response.status_code} {response.text}"
+        )
+    return response
+
+
+async def seed(
+    base_url: str, password: str, warehouses: int, items: int, applications: int
+) -> scenarios.Context:
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        token = check(
+            await client.post(
+                "/token", data={"username": USERNAME, "password": password}
+            )
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        warehouse_ids = []
+        for index in range(warehouses):
+            response = await client.post(
+                "/warehouse",
+                json={
+                    "warehouse_name": f"Load test {index}",
+                    "address": f"Address {index}",
+                },
+                headers=scenarios.idempotent(headers),
+            )
+            warehouse_ids.append(check(response).json()["id"])
+
+        run_id = uuid.uuid4().hex[:8]
+        seeded_items = [
+            (f"lt-{run_id}-{index}", f"Item {run_id} {index}", f"LT{run_id}{index}")
+            for index in range(items)
+        ]
+        file = io.StringIO()
+        writer = csv.writer(file)
+        writer.writerow(("id", "item_name", "manufacturer", "model", "codes"))
+        for item_id, name, code in seeded_items:
+            writer.writerow((item_id, name, "Load test", item_id, code))
+        check(
+            await client.post(
+                "/items/import",
+                files={"file": ("items.csv", file.getvalue().encode())},
+                headers=headers,
+            )
+        )
+
+        async def approve(body: dict):
+            response = await client.post(
+                "/applications", json=body, headers=scenarios.idempotent(headers)
+            )
+            check(
+                await client.put(
+                    "/applications/approve",
+                    params={"id": check(response).json()["id"]},
+                    headers=headers,
+                )
+            )
+
+        for warehouse_id in warehouse_ids:
+            await approve(
+                scenarios.application_body(
+                    "recieve",
+                    None,
+                    warehouse_id,
+                    {item_id: SEED_STOCK_COUNT for item_id, _, _ in seeded_items},
+                )
+            )
+
+        rng = random.Random(0)
+        semaphore = asyncio.Semaphore(SEED_CONCURRENCY)
+
+        async def seed_application(index: int):
+            payload = {
+                item_id: rng.randint(1, scenarios.MAX_APPLICATION_ITEM_COUNT)
+                for item_id, _, _ in rng.sample(
+                    seeded_items, scenarios.STOCK_ITEMS_PER_APPLICATION
+                )
+            }
+            warehouse_id = rng.choice(warehouse_ids)
+            body = scenarios.application_body("use", warehouse_id, None, payload)
+            async with semaphore:
+                # Every other application stays pending for the lists.
+                if index % 2:
+                    check(
+                        await client.post(
+                            "/applications",
+                            json=body,
+                            headers=scenarios.idempotent(headers),
+                        )
+                    )
+                else:
+                    await approve(body)
+
+        await asyncio.gather(*(seed_application(i) for i in range(applications)))
+
+    return scenarios.Context(USERNAME, password, token, warehouse_ids, seeded_items)
+
+
+def percentile(values: typing.List[float], rank: float) -> float:
+    index = max(0, min(len(values) - 1, round(rank / 100 * len(values)) - 1))
+    return values[index]
+
+
+def summarize(recorder: scenarios.Recorder, elapsed: float) -> dict:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        summary = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(endpoint, 0),
+            "throughput": len(latencies) / elapsed,
+        }
+        for rank in PERCENTILES:
+            summary[f"p{rank}_ms"] = percentile(latencies, rank) * 1000
+        endpoints[endpoint] = summary
+    return endpoints
+
+
+def print_summary(endpoints: dict):
+    print(
+        f"{'endpoint':<28} {'requests':>8} {'errors':>6} {'req/s':>8} "
+        + " ".join(f"{f'p{rank} ms':>8}" for rank in PERCENTILES)
+    )
+    for endpoint, summary in endpoints.items():
+        print(
+            f"{endpoint:<28} {summary['requests']:>8} {summary['errors']:>6} "
+            f"{summary['throughput']:>8.1f} "
+            + " ".join(f"{summary[f'p{rank}_ms']:>8.1f}" for rank in PERCENTILES)
+        )
+
+
+def compare(
+    endpoints: dict, baseline: dict, tolerance: float, min_delta_ms: float
+) -> typing.List[str]:
+    """
+    Returns the regressions against the baseline. Latencies regress when
+    they grow by more than `tolerance` and `min_delta_ms` at once, so
+    that jitter of fast endpoints does not fail the run.
+    """
+    regressions = []
+    for endpoint, summary in endpoints.items():
+        if summary["errors"]:
+            regressions.append(f"{endpoint}: {summary['errors']} failed requests")
+    for endpoint, expected in baseline["endpoints"].items():
+        summary = endpoints.get(endpoint)
+        if summary is None:
+            regressions.append(f"{endpoint}: no requests were made")
+            continue
+        for rank in PERCENTILES:
+            key = f"p{rank}_ms"
+            if summary[key] > expected[key] * (1 + tolerance) and (
+                summary[key] - expected[key] > min_delta_ms
+            ):
+                regressions.append(
+                    f"{endpoint}: p{rank} {summary[key]:.1f}ms, "
+                    f"baseline {expected[key]:.1f}ms"
+                )
+        if summary["throughput"] < expected["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: {summary['throughput']:.1f} req/s, "
+                f"baseline {expected['throughput']:.1f} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recreate-database", action="store_true")
+    parser.add_argument(
+        "--url", help="load an already running app instead of starting one"
+    )
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--server-log", default=DEFAULT_SERVER_LOG)
+    parser.add_argument("--warehouses", type=int, default=5)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--applications", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=5)
+    parser.add_argument("--output", help="write the results as json")
+    args = parser.parse_args()
+
+    if args.recreate_database:
+        recreate_database()
+    password = secrets.token_urlsafe(16)
+    connection = connect()
+    apply_migrations(connection)
+    create_superuser(connection, password)
+    connection.close()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        log = open(args.server_log, "w")
+        server = start_server(args.port, args.workers, log)
+        print(f"Server logs to {args.server_log}")
+    try:
+        wait_for_server(base_url, server)
+        started_at = time.perf_counter()
+        context = asyncio.run(
+            seed(base_url, password, args.warehouses, args.items, args.applications)
+        )
+        print(f"Seeded in {time.perf_counter() - started_at:.1f}s")
+        recorder, elapsed = asyncio.run(
+            scenarios.run_traffic(
+                base_url, context, args.users, args.duration, args.seed
+            )
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            log.close()
+
+    endpoints = summarize(recorder, elapsed)
+    results = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "users": args.users,
+        "duration": elapsed,
+        "endpoints": endpoints,
+    }
+    print_summary(endpoints)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline:
+            json.dump(results, baseline, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline["users"] != args.users:
+        print(
+            f"Baseline was made with {baseline['users']} users, "
+            f"throughput is not comparable"
+        )
+    regressions = compare(endpoints, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print("REGRESSIONS:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
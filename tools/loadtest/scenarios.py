@@ -0,0 +1,278 @@
+"""
+Traffic of the load test: every virtual user repeatedly picks a weighted
+scenario and records the latency of each request it makes under the
+endpoint name, so that one scenario may report several endpoints.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import random
+import time
+import typing
+import uuid
+
+import httpx
+
+STOCK_ITEMS_PER_APPLICATION = 5
+MAX_APPLICATION_ITEM_COUNT = 5
+
+
+class Context:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        token: str,
+        warehouse_ids: typing.List[str],
+        items: typing.List[typing.Tuple[str, str, str]],
+    ):
+        self.username = username
+        self.password = password
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.warehouse_ids = warehouse_ids
+        # (id, name, code) of every seeded item card.
+        self.items = items
+        self.etags: typing.Dict[str, str] = {}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: typing.Dict[str, typing.List[float]] = {}
+        self.errors: typing.Dict[str, int] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        started_at: float,
+        response: typing.Optional[httpx.Response],
+        expected: typing.Tuple[int, ...] = (200,),
+    ):
+        self.latencies.setdefault(endpoint, []).append(time.perf_counter() - started_at)
+        if response is None or response.status_code not in expected:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    endpoint: str,
+    method: str,
+    url: str,
+    expected: typing.Tuple[int, ...] = (200,),
+    **kwargs,
+) -> typing.Optional[httpx.Response]:
+    started_at = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        response = None
+    recorder.record(endpoint, started_at, response, expected)
+    return response
+
+
+def idempotent(headers: typing.Mapping[str, str]) -> typing.Dict[str, str]:
+    return {**headers, "x-request-idempotency-token": str(uuid.uuid4())}
+
+
+def application_body(
+    type: str,
+    sent_from_warehouse_id: typing.Optional[str],
+    sent_to_warehouse_id: typing.Optional[str],
+    payload: typing.Mapping[str, int],
+) -> dict:
+    return {
+        "application_data": {
+            "description": "load test",
+            "type": type,
+            "sent_from_warehouse_id": sent_from_warehouse_id,
+            "sent_to_warehouse_id": sent_to_warehouse_id,
+        },
+        "application_payload": {
+            "items": [
+                {
+                    "id": item_id,
+                    "item_name": "",
+                    "item_type": None,
+                    "manufacturer": None,
+                    "model": None,
+                    "description": None,
+                    "codes": [],
+                    "count": count,
+                }
+                for item_id, count in payload.items()
+            ]
+        },
+    }
+
+
+async def login(client, context: Context, recorder: Recorder, rng: random.Random):
+    await _request(
+        client,
+        recorder,
+        "POST /token",
+        "POST",
+        "/token",
+        data={"username": context.username, "password": context.password},
+    )
+
+
+async def applications_list(client, context, recorder, rng):
+    params = {"limit": 50}
+    if rng.random() < 0.5:
+        params["status_filter"] = rng.choice(("pending", "success"))
+    await _request(
+        client,
+        recorder,
+        "GET /applications/list",
+        "GET",
+        "/applications/list",
+        params=params,
+        headers=context.headers,
+    )
+
+
+async def items_list(client, context, recorder, rng):
+    await _request(
+        client,
+        recorder,
+        "GET /items/list",
+        "GET",
+        "/items/list",
+        headers=context.headers,
+    )
+
+
+async def items_search(client, context, recorder, rng):
+    _, name, code = rng.choice(context.items)
+    if rng.random() < 0.5:
+        params = {"query": name[: max(3, len(name) // 2)]}
+    else:
+        params = {"code": code}
+    await _request(
+        client,
+        recorder,
+        "GET /items/search",
+        "GET",
+        "/items/search",
+        params=params,
+        headers=context.headers,
+    )
+
+
+async def stock(client, context, recorder, rng):
+    warehouse_id = rng.choice(context.warehouse_ids)
+    headers = dict(context.headers)
+    etag = context.etags.get(warehouse_id)
+    if etag:
+        headers["If-None-Match"] = etag
+    response = await _request(
+        client,
+        recorder,
+        "GET /items/by-warehouse",
+        "GET",
+        "/items/by-warehouse",
+        expected=(200, 304),
+        params={"warehouse_id": warehouse_id},
+        headers=headers,
+    )
+    if response is not None and response.headers.get("etag"):
+        context.etags[warehouse_id] = response.headers["etag"]
+
+
+async def approve(client, context, recorder, rng):
+    warehouse_id = rng.choice(context.warehouse_ids)
+    payload = {
+        item_id: rng.randint(1, MAX_APPLICATION_ITEM_COUNT)
+        for item_id, _, _ in rng.sample(context.items, STOCK_ITEMS_PER_APPLICATION)
+    }
+    if rng.random() < 0.5:
+        body = application_body("recieve", None, warehouse_id, payload)
+    else:
+        body = application_body("use", warehouse_id, None, payload)
+    response = await _request(
+        client,
+        recorder,
+        "POST /applications",
+        "POST",
+        "/applications",
+        json=body,
+        headers=idempotent(context.headers),
+    )
+    if response is None or response.status_code != 200:
+        return
+    await _request(
+        client,
+        recorder,
+        "PUT /applications/approve",
+        "PUT",
+        "/applications/approve",
+        params={"id": response.json()["id"]},
+        headers=context.headers,
+    )
+
+
+async def report(client, context, recorder, rng):
+    to_date = datetime.now(timezone.utc)
+    from_date = to_date - timedelta(days=1)
+    await _request(
+        client,
+        recorder,
+        "POST /reports",
+        "POST",
+        "/reports",
+        json={
+            "interval": {
+                "from_date": from_date.isoformat(),
+                "to_date": to_date.isoformat(),
+            }
+        },
+        headers=context.headers,
+    )
+
+
+# Weights follow the usual day of the warehouse: mostly browsing lists and
+# stock, a steady flow of approvals and occasional logins and reports.
+SCENARIOS = (
+    (login, 1),
+    (applications_list, 6),
+    (items_list, 2),
+    (items_search, 4),
+    (stock, 6),
+    (approve, 4),
+    (report, 1),
+)
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    context: Context,
+    recorder: Recorder,
+    rng: random.Random,
+    deadline: float,
+):
+    scenarios = [scenario for scenario, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        await scenario(client, context, recorder, rng)
+
+
+async def run_traffic(
+    base_url: str, context: Context, users: int, duration: float, seed: int
+) -> typing.Tuple[Recorder, float]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        started_at = time.perf_counter()
+        deadline = started_at + duration
+        await asyncio.gather(
+            *(
+                virtual_user(
+                    client, context, recorder, random.Random(seed + user), deadline
+                )
+                for user in range(users)
+            )
+        )
+        elapsed = time.perf_counter() - started_at
+    return recorder, elapsed